@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""An asyncio github org client
+"""
+import asyncio
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from client import GithubOrgClient
+from utils import (
+    POOL_MAXSIZE,
+    get_json_async,
+    get_json_pages_async,
+)
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+
+    def __init__(self, org_name: str,
+                 semaphore: Optional[asyncio.Semaphore] = None) -> None:
+        """Init method of AsyncGithubOrgClient.
+        Requests wait on semaphore when one is given, so many clients
+        can share one concurrency limit.
+        """
+        self._org_name = org_name
+        self._semaphore = semaphore
+        self._org = None
+        self._repos_payload = None
+
+    async def org(self) -> Dict:
+        """Fetch (once) the org payload"""
+        if self._org is None:
+            url = self.ORG_URL.format(org=self._org_name)
+            self._org = await get_json_async(url, semaphore=self._semaphore)
+        return self._org
+
+    async def repos_payload(self) -> List[Dict]:
+        """Fetch (once) every page of the org's repos"""
+        if self._repos_payload is None:
+            url = (await self.org())["repos_url"]
+            pages = await get_json_pages_async(url,
+                                               semaphore=self._semaphore)
+            self._repos_payload = [repo for page in pages for repo in page]
+        return self._repos_payload
+
+    async def public_repos(self, license: str = None) -> List[str]:
+        """Public repos"""
+        return [
+            repo["name"] for repo in await self.repos_payload()
+            if license is None or GithubOrgClient.has_license(repo, license)
+        ]
+
+
+async def fetch_public_repos(org_names: Iterable[str], license: str = None,
+                             concurrency: int = POOL_MAXSIZE
+                             ) -> Dict[str, List[str]]:
+    """Fetch public repos for many orgs at once.
+    At most concurrency requests (org and repos pages alike) are in
+    flight; the default matches the shared connection pool so no
+    request waits for a socket.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    clients = [AsyncGithubOrgClient(name, semaphore) for name in org_names]
+    results = await asyncio.gather(
+        *(client.public_repos(license) for client in clients))
+    return {client._org_name: repos
+            for client, repos in zip(clients, results)}
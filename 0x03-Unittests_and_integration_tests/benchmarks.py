@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Benchmarks for the github org client against a local stub server.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+from unittest import mock
+
+import requests
+
+import utils
+from async_client import AsyncGithubOrgClient, fetch_public_repos
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+
+
+_encoded: Dict[int, Tuple[object, bytes, str]] = {}
+
+
+class StubGithubHandler(BaseHTTPRequestHandler):
+    """Serve fixture payloads over keep-alive HTTP/1.1."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes: Dict[str, object] = {}
+    delay = 0.0
+
+    def log_message(self, *args) -> None:
+        """Keep benchmark output quiet."""
+
+    @staticmethod
+    def encode(payload: object) -> Tuple[bytes, str]:
+        """Return the JSON body and ETag for payload, computed once."""
+        cached = _encoded.get(id(payload))
+        if cached is None or cached[0] is not payload:
+            body = json.dumps(payload).encode()
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            cached = _encoded[id(payload)] = (payload, body, etag)
+        return cached[1], cached[2]
+
+    def send_json(self, payload: object) -> None:
+        """Send payload as JSON, gzipped when the client accepts it.
+        Answers 304 when If-None-Match matches the payload's ETag.
+        """
+        body, etag = self.encode(payload)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        """Answer GET requests from the route table.
+        Sleeps delay seconds first to stand in for network latency.
+        """
+        if self.delay:
+            time.sleep(self.delay)
+        payload = self.routes.get(self.path.split("?")[0])
+        if payload is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(payload)
+
+
+def start_stub_server(
+        handler: type = StubGithubHandler) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub server on a free local port and return its base URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:{}".format(server.server_address[1])
+
+
+def time_calls(fetch: Callable[[str], object], url: str, calls: int) -> float:
+    """Return seconds per call for calls sequential fetches of url."""
+    fetch(url)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fetch(url)
+    return (time.perf_counter() - start) / calls
+
+
+def benchmark_session(calls: int = 500) -> None:
+    """Compare one-off requests.get calls with the pooled session."""
+    server, base_url = start_stub_server()
+    org_payload, repos_payload = TEST_PAYLOAD[0][:2]
+    StubGithubHandler.routes["/orgs/google"] = org_payload
+    StubGithubHandler.routes["/orgs/google/repos"] = repos_payload
+    try:
+        for path in ("/orgs/google", "/orgs/google/repos"):
+            url = base_url + path
+            plain = time_calls(lambda u: requests.get(u).json(), url, calls)
+            pooled = time_calls(utils.get_json, url, calls)
+            print("{:20} requests.get {:7.3f}ms  shared session {:7.3f}ms"
+                  .format(path, plain * 1000, pooled * 1000))
+    finally:
+        server.shutdown()
+
+
+def benchmark_http_cache(calls: int = 300) -> None:
+    """Compare refetching the repos payload with ETag revalidation."""
+    server, base_url = start_stub_server()
+    StubGithubHandler.routes["/orgs/google/repos"] = TEST_PAYLOAD[0][1]
+    url = base_url + "/orgs/google/repos"
+    directory = tempfile.mkdtemp()
+    cache = utils.HTTPCache(directory, ttl=0)
+    try:
+        plain = time_calls(utils.get_json, url, calls)
+        cached = time_calls(lambda u: utils.get_json(u, cache=cache),
+                            url, calls)
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory)
+    print("full refetch:        {:7.3f}ms".format(plain * 1000))
+    print("304 revalidation:    {:7.3f}ms".format(cached * 1000))
+
+
+def benchmark_async_client(orgs: int = 200, delay: float = 0.02) -> None:
+    """Compare sync and async clients over many orgs on a slow server."""
+    server, base_url = start_stub_server()
+    org_payload, repos_payload = TEST_PAYLOAD[0][:2]
+    names = ["org{}".format(i) for i in range(orgs)]
+    for name in names:
+        repos_path = "/orgs/{}/repos".format(name)
+        StubGithubHandler.routes["/orgs/" + name] = dict(
+            org_payload, repos_url=base_url + repos_path)
+        StubGithubHandler.routes[repos_path] = repos_payload
+    StubGithubHandler.delay = delay
+    org_url = base_url + "/orgs/{org}"
+    try:
+        start = time.perf_counter()
+        with mock.patch.object(GithubOrgClient, "ORG_URL", org_url):
+            sync = {name: GithubOrgClient(name).public_repos()
+                    for name in names}
+        sync_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with mock.patch.object(AsyncGithubOrgClient, "ORG_URL", org_url):
+            result = asyncio.run(fetch_public_repos(names))
+        async_time = time.perf_counter() - start
+    finally:
+        StubGithubHandler.delay = 0.0
+        server.shutdown()
+    assert result == sync
+    print("{} orgs, {:.0f}ms per request".format(orgs, delay * 1000))
+    print("sync client:         {:7.2f}s".format(sync_time))
+    print("async client:        {:7.2f}s  ({:.1f}x)".format(
+        async_time, sync_time / async_time))
+
+
+if __name__ == "__main__":
+    benchmark_session()
+    benchmark_http_cache()
+    benchmark_async_client()
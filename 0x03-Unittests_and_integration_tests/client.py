@@ -4,10 +4,12 @@
 from typing import (
     List,
     Dict,
+    Iterator,
 )
 
 from utils import (
     get_json,
+    get_json_pages,
     access_nested_map,
     memoize,
 )
@@ -32,10 +34,21 @@ class GithubOrgClient:
         """Public repos URL"""
         return self.org["repos_url"]
 
+    def iter_repos(self) -> Iterator[Dict]:
+        """Stream repos from every page of the repos URL"""
+        for page in get_json_pages(self._public_repos_url):
+            yield from page
+
     @memoize
-    def repos_payload(self) -> Dict:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+    def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload (all pages)"""
+        return list(self.iter_repos())
+
+    def iter_public_repos(self, license: str = None) -> Iterator[str]:
+        """Stream public repo names without holding every page"""
+        for repo in self.iter_repos():
+            if license is None or self.has_license(repo, license):
+                yield repo["name"]
 
     def public_repos(self, license: str = None) -> List[str]:
         """Public repos"""
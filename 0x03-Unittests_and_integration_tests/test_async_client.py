@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Unit and integration tests for AsyncGithubOrgClient class."""
+
+import asyncio
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+from async_client import AsyncGithubOrgClient, fetch_public_repos
+from fixtures import TEST_PAYLOAD
+from test_client import PagedReposHandler
+
+
+def returning(value):
+    """Coroutine function that returns value (for patch side_effect)."""
+    async def result(*args, **kwargs):
+        """Return value."""
+        return value
+    return result
+
+
+class TestAsyncGithubOrgClient(unittest.TestCase):
+    """Unit tests for AsyncGithubOrgClient class."""
+
+    org_payload, repos_payload, expected_repos, apache2_repos = \
+        TEST_PAYLOAD[0]
+
+    def test_org(self):
+        """Test org is fetched once from ORG_URL."""
+        with patch('async_client.get_json_async',
+                   side_effect=returning({"login": "google"})) \
+                as mock_get_json:
+            client = AsyncGithubOrgClient("google")
+            self.assertEqual(asyncio.run(client.org()), {"login": "google"})
+            asyncio.run(client.org())
+            mock_get_json.assert_called_once_with(
+                "https://api.github.com/orgs/google", semaphore=None)
+
+    def test_public_repos(self):
+        """Test public_repos with and without a license filter."""
+        with patch('async_client.get_json_async',
+                   side_effect=returning(self.org_payload)), \
+                patch('async_client.get_json_pages_async',
+                      side_effect=returning([self.repos_payload])) \
+                as mock_pages:
+            client = AsyncGithubOrgClient("google")
+            self.assertEqual(asyncio.run(client.public_repos()),
+                             self.expected_repos)
+            self.assertEqual(asyncio.run(client.public_repos("apache-2.0")),
+                             self.apache2_repos)
+            mock_pages.assert_called_once_with(
+                self.org_payload["repos_url"], semaphore=None)
+
+    def test_fetch_public_repos_bounded(self):
+        """Test org and page requests together stay within the limit."""
+        lock = threading.Lock()
+        active, peak = 0, 0
+
+        def fetch_json(url, timeout, cache):
+            """Serve 3 repos pages per org, tracking requests in flight."""
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            if "/repos" not in url:
+                return {"repos_url": url + "/repos"}, None
+            org = url.split("/")[-2]
+            if "page=" not in url:
+                link = ('<{0}?page=2>; rel="next", '
+                        '<{0}?page=3>; rel="last"').format(url)
+                return [{"name": org + "-1"}], link
+            return [{"name": "{}-{}".format(org, url[-1])}], None
+
+        names = ["org{}".format(i) for i in range(10)]
+        with patch('utils._fetch_json', side_effect=fetch_json) as mock:
+            result = asyncio.run(fetch_public_repos(names, concurrency=3))
+        self.assertEqual(result, {
+            name: ["{}-{}".format(name, page) for page in (1, 2, 3)]
+            for name in names})
+        self.assertEqual(mock.call_count, 40)
+        self.assertEqual(peak, 3)
+
+
+class TestAsyncPaginatedGithubOrgClient(unittest.TestCase):
+    """Integration tests against the paged local stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the paged stub server and point ORG_URL at it."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PagedReposHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        org_url = "http://127.0.0.1:{}/orgs/{{org}}".format(
+            cls.server.server_address[1])
+        cls.url_patcher = patch.object(AsyncGithubOrgClient, "ORG_URL",
+                                       org_url)
+        cls.url_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the server and restore ORG_URL."""
+        cls.url_patcher.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_public_repos_all_pages(self):
+        """Test every page is collected, in order."""
+        client = AsyncGithubOrgClient("paged")
+        expected = ["repo{}".format(i)
+                    for i in range(PagedReposHandler.total)]
+        self.assertEqual(asyncio.run(client.public_repos()), expected)
+
+    def test_fetch_public_repos(self):
+        """Test the batch helper returns one entry per org."""
+        names = ["org{}".format(i) for i in range(5)]
+        result = asyncio.run(
+            fetch_public_repos(names, license="apache-2.0"))
+        self.assertEqual(list(result), names)
+        for repos in result.values():
+            self.assertEqual(len(repos), -(-PagedReposHandler.total // 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 """Unit and integration tests for GithubOrgClient class."""
 
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from parameterized import parameterized, parameterized_class
 from unittest.mock import patch, Mock, PropertyMock
+from urllib.parse import parse_qs, urlparse
+import utils
 from client import GithubOrgClient
 from fixtures import TEST_PAYLOAD
 
@@ -37,14 +45,15 @@ class TestGithubOrgClient(unittest.TestCase):
             result = client._public_repos_url
             self.assertEqual(result, "https://api.github.com/orgs/test/repos")
 
-    @patch('client.get_json')
+    @patch('client.get_json_pages')
     def test_public_repos(self, mock_get_json):
         """Test GithubOrgClient.public_repos returns expected repos list."""
         test_payload = [
             {"name": "repo1", "license": {"key": "apache-2.0"}},
             {"name": "repo2", "license": {"key": "mit"}},
         ]
-        mock_get_json.return_value = test_payload
+        mock_get_json.return_value = iter([test_payload[:1],
+                                           test_payload[1:]])
         with patch('client.GithubOrgClient._public_repos_url',
                    new_callable=PropertyMock) as mock_url:
             mock_url.return_value = "https://api.github.com/orgs/test/repos"
@@ -73,12 +82,17 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Set up class with mocked requests.get for fixture payloads."""
-        cls.get_patcher = patch('requests.get')
+        payloads = {
+            GithubOrgClient.ORG_URL.format(org="google"): cls.org_payload,
+            cls.org_payload["repos_url"]: cls.repos_payload,
+        }
+
+        def get(url, *args, **kwargs):
+            """Return the fixture payload for url."""
+            return Mock(json=Mock(return_value=payloads[url]), headers={})
+
+        cls.get_patcher = patch('requests.Session.get', side_effect=get)
         cls.mock_get = cls.get_patcher.start()
-        cls.mock_get.side_effect = [
-            Mock(json=Mock(return_value=cls.org_payload)),
-            Mock(json=Mock(return_value=cls.repos_payload)),
-        ]
 
     @classmethod
     def tearDownClass(cls):
@@ -97,5 +111,134 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
                          self.apache2_repos)
 
 
+class PagedReposHandler(BaseHTTPRequestHandler):
+    """Serve orgs whose repos are split into Link-header pages."""
+    protocol_version = "HTTP/1.1"
+    total = 3000
+    per_page = 100
+    link_last = True
+    seen = []
+
+    def log_message(self, *args) -> None:
+        """Keep test output quiet."""
+
+    def do_GET(self) -> None:
+        """Answer the org URL and one page of its repos."""
+        base = "http://{}:{}".format(*self.server.server_address)
+        parts = urlparse(self.path)
+        if not parts.path.endswith("/repos"):
+            payload, links = {"repos_url": base + parts.path + "/repos"}, []
+        else:
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            last = -(-self.total // self.per_page)
+            start = (page - 1) * self.per_page
+            payload = [
+                {"name": "repo{}".format(i),
+                 "license": {"key": "mit" if i % 3 else "apache-2.0"}}
+                for i in range(start, min(start + self.per_page, self.total))
+            ]
+            page_url = base + parts.path + "?page={}"
+            links = []
+            if page < last:
+                links.append('<{}>; rel="next"'.format(page_url.format(
+                    page + 1)))
+                if self.link_last:
+                    links.append('<{}>; rel="last"'.format(page_url.format(
+                        last)))
+        body = json.dumps(payload).encode()
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        self.seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        if links:
+            self.send_header("Link", ", ".join(links))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestPaginatedGithubOrgClient(unittest.TestCase):
+    """Integration tests for Link-header pagination on a local server."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the paged stub server and point ORG_URL at it."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PagedReposHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        org_url = "http://127.0.0.1:{}/orgs/{{org}}".format(
+            cls.server.server_address[1])
+        cls.url_patcher = patch.object(GithubOrgClient, "ORG_URL", org_url)
+        cls.url_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the server and restore ORG_URL."""
+        cls.url_patcher.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def expected(self, license=None):
+        """Names the stub server should yield, in order."""
+        apache = license == "apache-2.0"
+        return ["repo{}".format(i) for i in range(PagedReposHandler.total)
+                if license is None or (i % 3 == 0) == apache]
+
+    def test_public_repos_all_pages(self):
+        """Test public_repos collects every page in order."""
+        client = GithubOrgClient("paged")
+        self.assertEqual(client.public_repos(), self.expected())
+        self.assertEqual(client.public_repos("apache-2.0"),
+                         self.expected("apache-2.0"))
+
+    def test_follows_next_without_last(self):
+        """Test pages are followed one by one when rel="last" is absent."""
+        with patch.object(PagedReposHandler, "link_last", False):
+            client = GithubOrgClient("paged")
+            self.assertEqual(list(client.iter_public_repos("mit")),
+                             self.expected("mit"))
+
+    def test_second_run_revalidates_repos(self):
+        """Test every repos page is revalidated through the cache."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with patch.object(utils, "http_cache",
+                          utils.HTTPCache(directory, max_entries=64, ttl=0)):
+            first = GithubOrgClient("cached").public_repos()
+            del PagedReposHandler.seen[:]
+            second = GithubOrgClient("cached").public_repos()
+        self.assertEqual(first, second)
+        self.assertEqual(second, self.expected())
+        repos = [(path, etag) for path, etag in PagedReposHandler.seen
+                 if "/repos" in path]
+        self.assertEqual(len(repos), 30)
+        self.assertTrue(all(etag for _, etag in repos))
+
+    def test_iter_public_repos_streams(self):
+        """Test iter_public_repos yields before every page is read."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with patch.object(utils, "http_cache",
+                          utils.HTTPCache(directory, max_entries=64)):
+            del PagedReposHandler.seen[:]
+            names = GithubOrgClient("streamed").iter_public_repos()
+            # Into the second page, the first one run concurrently
+            first = [next(names) for _ in range(PagedReposHandler.per_page
+                                                + 1)]
+            requested = [path for path, _ in PagedReposHandler.seen
+                         if "/repos" in path]
+            names.close()
+        self.assertEqual(first[:3], ["repo0", "repo1", "repo2"])
+        self.assertEqual(first[-1], "repo100")
+        # Page 1, page 2, and at most max_workers pages ahead of it
+        self.assertLessEqual(len(requested), 2 + 8)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 """Unit tests for utils module."""
 
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from parameterized import parameterized
+import utils
 from unittest.mock import patch, Mock
-from utils import access_nested_map, get_json, memoize
+from utils import (
+    access_nested_map,
+    get_json,
+    get_session,
+    memoize,
+    parse_link_header,
+    HTTPCache,
+)
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -37,17 +49,126 @@ class TestGetJson(unittest.TestCase):
         ("http://example.com", {"payload": True}),
         ("http://holberton.io", {"payload": False}),
     ])
-    @patch('utils.requests.get')
-    def test_get_json(self, test_url, test_payload, mock_get):
+    @patch('utils.get_session')
+    def test_get_json(self, test_url, test_payload, mock_session):
         """Test get_json returns JSON payload."""
         mock_response = Mock()
         mock_response.json.return_value = test_payload
-        mock_get.return_value = mock_response
+        mock_session.return_value.get.return_value = mock_response
         result = get_json(test_url)
-        mock_get.assert_called_once_with(test_url)
+        mock_session.return_value.get.assert_called_once_with(
+            test_url, timeout=utils.DEFAULT_TIMEOUT)
         self.assertEqual(result, test_payload)
 
 
+class TestParseLinkHeader(unittest.TestCase):
+    """Test cases for parse_link_header function."""
+
+    @parameterized.expand([
+        (None, {}),
+        ("", {}),
+        ('<https://x/r?page=2>; rel="next", <https://x/r?page=9>; rel="last"',
+         {"next": "https://x/r?page=2", "last": "https://x/r?page=9"}),
+        ('<https://x/r?page=1>; rel="prev first"',
+         {"prev": "https://x/r?page=1", "first": "https://x/r?page=1"}),
+    ])
+    def test_parse_link_header(self, value, expected):
+        """Test parse_link_header maps each rel to its URL."""
+        self.assertEqual(parse_link_header(value), expected)
+
+
+class TestGetSession(unittest.TestCase):
+    """Test cases for the shared HTTP session."""
+
+    def test_session_is_shared(self):
+        """Test get_session returns one session for every caller."""
+        self.assertIs(get_session(), get_session())
+
+    def test_session_pool_and_headers(self):
+        """Test the session uses a sized pool and asks for gzip."""
+        session = get_session()
+        adapter = session.get_adapter("https://api.github.com")
+        self.assertEqual(adapter._pool_maxsize, utils.POOL_MAXSIZE)
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+
+
+class TestHTTPCache(unittest.TestCase):
+    """Test cases for conditional requests through HTTPCache."""
+
+    url = "https://api.github.com/orgs/google/repos"
+
+    def setUp(self):
+        """Create an empty cache directory."""
+        self.directory = tempfile.mkdtemp()
+        self.cache = HTTPCache(self.directory, max_entries=2, ttl=0)
+
+    def tearDown(self):
+        """Remove the cache directory."""
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def response(status, payload=None, headers=None):
+        """Build a fake response."""
+        return Mock(status_code=status, headers=headers or {},
+                    json=Mock(return_value=payload))
+
+    @patch('utils.get_session')
+    def test_revalidates_and_serves_304_from_cache(self, mock_session):
+        """Test a stored ETag is sent back and a 304 reuses the payload."""
+        mock_get = mock_session.return_value.get
+        mock_get.side_effect = [
+            self.response(200, [{"name": "repo1"}], {"ETag": '"v1"'}),
+            self.response(304),
+        ]
+        first = get_json(self.url, cache=self.cache)
+        second = get_json(self.url, cache=self.cache)
+        self.assertEqual(first, [{"name": "repo1"}])
+        self.assertEqual(second, first)
+        headers = mock_get.call_args_list[1][1]["headers"]
+        self.assertEqual(headers, {"If-None-Match": '"v1"'})
+
+    @patch('utils.get_session')
+    def test_fresh_entry_skips_request(self, mock_session):
+        """Test entries within the TTL are served without a request."""
+        self.cache.ttl = 60
+        mock_get = mock_session.return_value.get
+        mock_get.return_value = self.response(
+            200, {"login": "google"},
+            {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        get_json(self.url, cache=self.cache)
+        self.assertEqual(get_json(self.url, cache=self.cache),
+                         {"login": "google"})
+        mock_get.assert_called_once()
+
+    @patch('utils.get_session')
+    def test_cached_payload_is_a_copy(self, mock_session):
+        """Test mutating a returned payload leaves the cache intact."""
+        self.cache.ttl = 60
+        mock_session.return_value.get.return_value = self.response(
+            200, [{"name": "repo1"}], {"ETag": '"v1"'})
+        get_json(self.url, cache=self.cache).append({"name": "mine"})
+        cached = get_json(self.url, cache=self.cache)
+        cached[0]["name"] = "changed"
+        self.assertEqual(get_json(self.url, cache=self.cache),
+                         [{"name": "repo1"}])
+
+    def test_entries_persist_on_disk(self):
+        """Test a new cache over the same directory sees stored entries."""
+        self.cache.set(self.url, {"login": "google"}, '"v1"', None)
+        reopened = HTTPCache(self.directory)
+        self.assertEqual(reopened.get(self.url)["etag"], '"v1"')
+
+    def test_store_is_bounded(self):
+        """Test the cache never keeps more than max_entries."""
+        for number in range(5):
+            self.cache.set("{}?page={}".format(self.url, number),
+                           [number], '"v{}"'.format(number), None)
+        reopened = HTTPCache(self.directory)
+        kept = [number for number in range(5) if reopened.get(
+            "{}?page={}".format(self.url, number)) is not None]
+        self.assertEqual(len(kept), 2)
+
+
 class TestMemoize(unittest.TestCase):
     """Test cases for memoize decorator."""
 
@@ -74,6 +195,145 @@ class TestMemoize(unittest.TestCase):
             self.assertEqual(result2, 42)
             mock_method.assert_called_once()
 
+    @staticmethod
+    def counting_class(ttl=None, delay=0.0):
+        """Build a class whose memoized value counts its computations."""
+
+        class Counter:
+            """Counts calls to its memoized property."""
+
+            def __init__(self):
+                self.calls = 0
+
+            @memoize(ttl=ttl)
+            def value(self):
+                """Slow value numbered by call."""
+                time.sleep(delay)
+                self.calls += 1
+                return self.calls
+
+        return Counter
+
+    def test_memoize_single_flight(self):
+        """Test concurrent first reads compute the value once."""
+        obj = self.counting_class(delay=0.05)()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def read():
+            """Read the property once every thread is ready."""
+            barrier.wait()
+            results.append(obj.value)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [1] * 8)
+        self.assertEqual(obj.calls, 1)
+
+    def test_memoize_instances_do_not_block(self):
+        """Test a slow computation only blocks its own instance."""
+        started, release = threading.Event(), threading.Event()
+
+        class Slow:
+            """Memoized value that can be held until released."""
+
+            def __init__(self, hold):
+                self.hold = hold
+
+            @memoize
+            def value(self):
+                """Wait for release when holding."""
+                if self.hold:
+                    started.set()
+                    release.wait(5)
+                return self.hold
+
+        slow = Slow(True)
+        thread = threading.Thread(target=lambda: slow.value)
+        thread.start()
+        started.wait(5)
+        start = time.monotonic()
+        self.assertFalse(Slow(False).value)
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        thread.join()
+        self.assertTrue(slow.value)
+
+    def test_memoize_failure_not_cached(self):
+        """Test an exception is raised again rather than cached."""
+
+        class Flaky:
+            """Fails on the first read only."""
+            calls = 0
+
+            @memoize
+            def value(self):
+                """Raise once, then return 42."""
+                Flaky.calls += 1
+                if Flaky.calls == 1:
+                    raise ValueError("boom")
+                return 42
+
+        obj = Flaky()
+        with self.assertRaises(ValueError):
+            obj.value
+        self.assertEqual(obj.value, 42)
+        self.assertEqual(Flaky.calls, 2)
+
+    @parameterized.expand([
+        (None, 1),
+        (0, 3),
+    ])
+    def test_memoize_ttl(self, ttl, expected):
+        """Test values are reused until they are older than ttl."""
+        obj = self.counting_class(ttl=ttl)()
+        for _ in range(3):
+            last = obj.value
+        self.assertEqual(last, expected)
+
+    def test_memoize_invalidate(self):
+        """Test invalidate makes the next read recompute."""
+        counter_class = self.counting_class()
+        obj = counter_class()
+        self.assertEqual(obj.value, 1)
+        counter_class.value.invalidate(obj)
+        self.assertEqual(obj.value, 2)
+        self.assertEqual(obj.value, 2)
+
+    def test_memoize_read_only(self):
+        """Test assigning to a memoized attribute fails like a property."""
+        obj = self.counting_class()()
+        with self.assertRaises(AttributeError):
+            obj.value = 3
+
+    def test_memoize_slots(self):
+        """Test classes with __slots__ work when they declare the slot."""
+
+        class Slotted:
+            """Stores the memoized value in a slot."""
+            __slots__ = ("_value",)
+
+            @memoize
+            def value(self):
+                """Return 42."""
+                return 42
+
+        class Closed:
+            """Has no room for the memoized value."""
+            __slots__ = ()
+
+            @memoize
+            def value(self):
+                """Return 42."""
+                return 42
+
+        self.assertEqual(Slotted().value, 42)
+        with self.assertRaises(AttributeError):
+            Closed().value
+
 
 if __name__ == '__main__':
     unittest.main()
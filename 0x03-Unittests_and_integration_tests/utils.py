@@ -1,22 +1,53 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
 import requests
-from functools import wraps
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import update_wrapper
+from itertools import islice
+from requests.adapters import HTTPAdapter
 from typing import (
     Mapping,
     Sequence,
     Any,
     Dict,
     Callable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
 )
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 __all__ = [
     "access_nested_map",
     "get_json",
+    "get_json_async",
+    "get_json_pages",
+    "get_json_pages_async",
+    "get_session",
+    "parse_link_header",
+    "HTTPCache",
+    "configure_http_cache",
     "memoize",
 ]
 
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+DEFAULT_TIMEOUT = (3.05, 30)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+http_cache: Optional["HTTPCache"] = None
+
 
 def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     """Access nested map with key path.
@@ -40,15 +71,331 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session.
+    The session keeps connections alive in a pool of up to
+    POOL_MAXSIZE sockets per host, shared by all threads, so repeated
+    calls to the same API skip DNS, TCP and TLS setup.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                                      pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Accept-Encoding": "gzip, deflate",
+                    "Connection": "keep-alive",
+                })
+                _session = session
+    return _session
+
+
+class HTTPCache:
+    """Bounded on-disk cache of JSON responses keyed by URL.
+    Each entry keeps the payload with its ETag and Last-Modified
+    validators. Entries younger than ttl seconds are served without a
+    request; older ones are revalidated with a conditional request.
+    Beyond max_entries the least recently stored entries are dropped.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 256,
+                 ttl: float = 60.0) -> None:
+        """Init method of HTTPCache"""
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parsed: Dict[str, Dict] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """File holding the entry for url"""
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for url, or None"""
+        with self._lock:
+            entry = self._parsed.get(url)
+            if entry is not None:
+                return entry
+            path = self._path(url)
+            try:
+                with open(path) as cached:
+                    entry = json.load(cached)
+                entry["stored_at"] = os.path.getmtime(path)
+            except (OSError, ValueError):
+                return None
+            self._parsed[url] = entry
+            return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """Whether entry can be served without revalidation"""
+        return time.time() - entry["stored_at"] < self.ttl
+
+    def set(self, url: str, payload: Any, etag: Optional[str],
+            last_modified: Optional[str], link: Optional[str] = None
+            ) -> None:
+        """Store payload, its validators and its Link header for url"""
+        entry = {"url": url, "etag": etag, "last_modified": last_modified,
+                 "link": link, "payload": payload}
+        self._write(url, entry)
+
+    def touch(self, url: str, entry: Dict) -> None:
+        """Mark entry as revalidated now without rewriting it"""
+        with self._lock:
+            now = time.time()
+            try:
+                os.utime(self._path(url), (now, now))
+            except OSError:
+                return
+            entry["stored_at"] = now
+
+    def _write(self, url: str, entry: Dict) -> None:
+        """Write entry atomically and enforce max_entries"""
+        path = self._path(url)
+        with self._lock:
+            tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+            with open(tmp_path, "w") as cached:
+                json.dump(entry, cached)
+            os.replace(tmp_path, path)
+            entry["stored_at"] = os.path.getmtime(path)
+            self._parsed[url] = entry
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest entries beyond max_entries"""
+        paths = [os.path.join(self.directory, name)
+                 for name in os.listdir(self.directory)
+                 if name.endswith(".json")]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            os.remove(path)
+        self._parsed.clear()
+
+
+def configure_http_cache(directory: Optional[str], max_entries: int = 256,
+                         ttl: float = 60.0) -> Optional[HTTPCache]:
+    """Turn the get_json response cache on (or off with None).
+    """
+    global http_cache
+    http_cache = None if directory is None else HTTPCache(
+        directory, max_entries, ttl)
+    return http_cache
+
+
+def _fetch_json(url: str, timeout: Tuple[float, float],
+                cache: Optional[HTTPCache]) -> Tuple[Any, Optional[str]]:
+    """Return (payload, Link header) for url, through cache if given.
+    The cache keeps its own copy of each payload, so callers are free
+    to mutate what they get back.
+    """
+    if cache is None:
+        response = get_session().get(url, timeout=timeout)
+        return response.json(), response.headers.get("Link")
+
+    entry = cache.get(url)
+    if entry is not None and cache.is_fresh(entry):
+        return copy.deepcopy(entry["payload"]), entry.get("link")
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = get_session().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and entry is not None:
+        cache.touch(url, entry)
+        return copy.deepcopy(entry["payload"]), entry.get("link")
+    payload = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    link = response.headers.get("Link")
+    if response.status_code == 200 and (etag or last_modified):
+        cache.set(url, copy.deepcopy(payload), etag, last_modified, link)
+    return payload, link
+
+
+def get_json(url: str,
+             timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+             cache: Optional[HTTPCache] = None) -> Dict:
     """Get JSON from remote URL.
+    With a cache (passed in or set by configure_http_cache) fresh
+    entries are returned as is, stale ones are revalidated with
+    If-None-Match / If-Modified-Since and a 304 reuses the stored
+    payload.
     """
-    response = requests.get(url)
-    return response.json()
+    return _fetch_json(url, timeout, cache or http_cache)[0]
 
 
-def memoize(fn: Callable) -> Callable:
-    """Decorator to memoize a method.
+def parse_link_header(value: Optional[str]) -> Dict[str, str]:
+    """Parse an RFC 8288 Link header into a {rel: url} dict.
+    Example
+    -------
+    >>> parse_link_header('<https://x/?page=2>; rel="next"')
+    {'next': 'https://x/?page=2'}
+    """
+    links = {}
+    for part in (value or "").split(","):
+        section = part.split(";")
+        url = section[0].strip()
+        if not (url.startswith("<") and url.endswith(">")):
+            continue
+        for param in section[1:]:
+            key, _, rel = param.strip().partition("=")
+            if key == "rel":
+                for name in rel.strip('"').split():
+                    links[name] = url[1:-1]
+    return links
+
+
+def _page_url(url: str, page: int) -> str:
+    """Return url with its page query parameter set to page"""
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _remaining_pages(links: Dict[str, str]) -> Optional[range]:
+    """Page numbers from rel="next" to rel="last", if both are known"""
+    if "last" not in links or "next" not in links:
+        return None
+    try:
+        last_page = int(parse_qs(urlparse(links["last"]).query)["page"][0])
+        next_page = int(parse_qs(urlparse(links["next"]).query)["page"][0])
+    except (KeyError, ValueError):
+        return None
+    return range(next_page, last_page + 1)
+
+
+def get_json_pages(url: str, max_workers: int = 8,
+                   timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                   cache: Optional[HTTPCache] = None) -> Iterator[List]:
+    """Yield every page of a paginated JSON list, in order.
+    Pages are found through the Link header. When the first page
+    names the last one, the remaining pages are fetched concurrently,
+    never more than max_workers ahead of the consumer, and yielded in
+    page order; otherwise rel="next" is followed one page at a time.
+    Every page goes through the cache like get_json, and a cached or
+    revalidated page keeps its stored Link header.
+    """
+    cache = cache or http_cache
+    payload, link = _fetch_json(url, timeout, cache)
+    yield payload
+    links = parse_link_header(link)
+
+    pages = _remaining_pages(links)
+    if pages is None:
+        while "next" in links:
+            payload, link = _fetch_json(links["next"], timeout, cache)
+            yield payload
+            links = parse_link_header(link)
+        return
+
+    def fetch(page: int) -> List:
+        """Fetch one page"""
+        page_url = _page_url(links["next"], page)
+        return _fetch_json(page_url, timeout, cache)[0]
+
+    # A sliding window: the next page is submitted as each one is taken,
+    # so a consumer that stops early has not requested every page
+    pages = iter(pages)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    window = deque()
+    try:
+        for page in islice(pages, max_workers):
+            window.append(executor.submit(fetch, page))
+        while window:
+            payload = window.popleft().result()
+            for page in islice(pages, 1):
+                window.append(executor.submit(fetch, page))
+            yield payload
+    finally:
+        for future in window:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+_http_executor = ThreadPoolExecutor(max_workers=POOL_MAXSIZE,
+                                    thread_name_prefix="http")
+
+
+async def _fetch_json_async(url: str, timeout: Tuple[float, float],
+                            cache: Optional[HTTPCache],
+                            semaphore: Optional[asyncio.Semaphore]
+                            ) -> Tuple[Any, Optional[str]]:
+    """Run _fetch_json on the HTTP executor, holding semaphore if given"""
+    loop = asyncio.get_running_loop()
+    if semaphore is None:
+        return await loop.run_in_executor(
+            _http_executor, _fetch_json, url, timeout, cache)
+    async with semaphore:
+        return await loop.run_in_executor(
+            _http_executor, _fetch_json, url, timeout, cache)
+
+
+async def get_json_async(url: str,
+                         timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                         cache: Optional[HTTPCache] = None,
+                         semaphore: Optional[asyncio.Semaphore] = None
+                         ) -> Dict:
+    """Await get_json without blocking the event loop.
+    The request runs on a worker thread over the shared session, so
+    async and sync callers draw from the same connection pool and
+    HTTP cache. The executor has POOL_MAXSIZE threads, so no more
+    requests are in flight than the pool has sockets.
+    """
+    cache = cache or http_cache
+    return (await _fetch_json_async(url, timeout, cache, semaphore))[0]
+
+
+async def get_json_pages_async(url: str,
+                               timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                               cache: Optional[HTTPCache] = None,
+                               semaphore: Optional[asyncio.Semaphore] = None
+                               ) -> List:
+    """Await every page of a paginated JSON list (see get_json_pages).
+    Each page is its own request held under semaphore, so page fetches
+    count against the same limit as the caller's other requests.
+    """
+    cache = cache or http_cache
+    payload, link = await _fetch_json_async(url, timeout, cache, semaphore)
+    pages = [payload]
+    links = parse_link_header(link)
+    remaining = _remaining_pages(links)
+    if remaining is None:
+        while "next" in links:
+            payload, link = await _fetch_json_async(
+                links["next"], timeout, cache, semaphore)
+            pages.append(payload)
+            links = parse_link_header(link)
+        return pages
+    results = await asyncio.gather(*(
+        _fetch_json_async(_page_url(links["next"], page), timeout, cache,
+                          semaphore)
+        for page in remaining))
+    return pages + [payload for payload, _ in results]
+
+
+class _Memo:
+    """Per-instance memoize state: a lock and (value, stored_at)"""
+    __slots__ = ("lock", "result")
+
+    def __init__(self) -> None:
+        """Init method of _Memo"""
+        self.lock = threading.Lock()
+        self.result = None
+
+
+class memoize:
+    """Decorator to memoize a method as a read-only attribute.
     Example
     -------
     class MyClass:
@@ -62,14 +409,73 @@ def memoize(fn: Callable) -> Callable:
     42
     >>> my_object.a_method
     42
+
+    Concurrent first reads on one instance call the method once
+    (other threads wait for its result); a failed call caches nothing.
+    With @memoize(ttl=seconds) the value is recomputed once it is
+    older than ttl. MyClass.a_method.invalidate(my_object) drops it.
+    State lives in the instance attribute "_a_method", so a class
+    with __slots__ must declare that slot.
     """
-    attr_name = "_{}".format(fn.__name__)
 
-    @wraps(fn)
-    def memoized(self):
-        """"memoized wraps"""
-        if not hasattr(self, attr_name):
-            setattr(self, attr_name, fn(self))
-        return getattr(self, attr_name)
+    def __init__(self, fn: Optional[Callable] = None, *,
+                 ttl: Optional[float] = None) -> None:
+        """Init method of memoize"""
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if fn is not None:
+            self(fn)
+
+    def __call__(self, fn: Callable) -> "memoize":
+        """Wrap fn (used as @memoize(ttl=...))"""
+        self.fn = fn
+        self.attr_name = "_{}".format(fn.__name__)
+        update_wrapper(self, fn)
+        return self
+
+    def _entry(self, obj: Any) -> _Memo:
+        """Return obj's state, creating it on first use"""
+        entry = getattr(obj, self.attr_name, None)
+        if entry is None:
+            with self._lock:
+                entry = getattr(obj, self.attr_name, None)
+                if entry is None:
+                    entry = _Memo()
+                    try:
+                        setattr(obj, self.attr_name, entry)
+                    except AttributeError:
+                        raise AttributeError(
+                            "memoize needs a __dict__ or a {!r} slot on {}"
+                            .format(self.attr_name, type(obj).__name__)
+                        ) from None
+        return entry
+
+    def _fresh(self, result: Optional[Tuple[Any, float]]) -> bool:
+        """Whether a stored (value, stored_at) may be returned"""
+        return result is not None and (
+            self.ttl is None or time.monotonic() - result[1] < self.ttl)
+
+    def __get__(self, obj: Any, objtype: type = None) -> Any:
+        """Return the cached value, computing it at most once at a time"""
+        if obj is None:
+            return self
+        entry = self._entry(obj)
+        result = entry.result
+        if self._fresh(result):
+            return result[0]
+        with entry.lock:
+            result = entry.result
+            if not self._fresh(result):
+                result = entry.result = (self.fn(obj), time.monotonic())
+            return result[0]
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        """Memoized attributes are read-only, like a property"""
+        raise AttributeError("can't set attribute {!r}".format(
+            self.fn.__name__))
 
-    return property(memoized)
\ No newline at end of file
+    def invalidate(self, obj: Any) -> None:
+        """Drop obj's cached value; the next read recomputes it"""
+        entry = getattr(obj, self.attr_name, None)
+        if entry is not None:
+            entry.result = None
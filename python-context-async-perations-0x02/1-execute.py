@@ -1,10 +1,18 @@
 import sqlite3
 
 class ExecuteQuery:
-    def __init__(self, db_name, query, params=()):
+    def __init__(self, db_name, query, params=(), stream=False,
+                 chunk_size=1000, columnar=False):
         self.db_name = db_name
         self.query = query
         self.params = params
+        # stream: __enter__ returns an iterator over rows pulled with
+        # fetchmany instead of a list; columnar: the iterator yields one
+        # {column: [values]} dict per chunk. Either way memory is bounded
+        # by chunk_size, and the iterator is only valid inside the block.
+        self.stream = stream or columnar
+        self.chunk_size = chunk_size
+        self.columnar = columnar
         self.conn = None
         self.cursor = None
 
@@ -12,8 +20,28 @@ class ExecuteQuery:
         self.conn = sqlite3.connect(self.db_name)
         self.cursor = self.conn.cursor()
         self.cursor.execute(self.query, self.params)
+        if self.columnar:
+            return self._iter_columns()
+        if self.stream:
+            return self._iter_rows()
         return self.cursor.fetchall()
 
+    def _iter_chunks(self):
+        while True:
+            rows = self.cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            yield rows
+
+    def _iter_rows(self):
+        for rows in self._iter_chunks():
+            yield from rows
+
+    def _iter_columns(self):
+        names = [column[0] for column in self.cursor.description]
+        for rows in self._iter_chunks():
+            yield dict(zip(names, map(list, zip(*rows))))
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
             self.conn.commit()
@@ -26,5 +54,10 @@ def main():
         for row in results:
             print(row)
 
+    with ExecuteQuery('users.db', query, (25,), columnar=True) as chunks:
+        for chunk in chunks:
+            print(f"{len(chunk['id'])} rows, average age "
+                  f"{sum(chunk['age']) / len(chunk['age']):.1f}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
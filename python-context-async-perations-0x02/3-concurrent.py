@@ -1,24 +1,32 @@
 import asyncio
-import aiosqlite
+import tracemalloc
+
+from async_pool import get_pool
+from query_scheduler import QueryScheduler
 
 # Fetch all users asynchronously
-async def async_fetch_users():
-    async with aiosqlite.connect("users.db") as db:
+async def async_fetch_users(fusion=None):
+    if fusion is not None:
+        return await fusion.select("users")
+    async with get_pool("users.db").connection() as db:
         async with db.execute("SELECT * FROM users") as cursor:
             return await cursor.fetchall()
 
 # Fetch users older than 40 asynchronously
-async def async_fetch_older_users():
-    async with aiosqlite.connect("users.db") as db:
+async def async_fetch_older_users(fusion=None):
+    if fusion is not None:
+        return await fusion.select("users", ("age", ">", 40))
+    async with get_pool("users.db").connection() as db:
         async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
             return await cursor.fetchall()
 
-# Run both queries concurrently
-async def fetch_concurrently():
-    all_users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+# Run both queries concurrently; with a ScanFusion they share one scan
+async def fetch_concurrently(fusion=None):
+    scheduler = QueryScheduler(limit=4)
+    all_users, older_users = await scheduler.gather([
+        scheduler.submit(async_fetch_users(fusion)),
+        scheduler.submit(async_fetch_older_users(fusion))
+    ])
     print("All users:")
     for user in all_users:
         print(user)
@@ -26,6 +34,54 @@ async def fetch_concurrently():
     for user in older_users:
         print(user)
 
+# Stream all users in chunks instead of one list
+def async_stream_users(chunk_size=500):
+    return get_pool("users.db").stream(
+        "SELECT * FROM users", chunk_size=chunk_size, chunks=True)
+
+# Stream users older than 40 in chunks
+def async_stream_older_users(chunk_size=500):
+    return get_pool("users.db").stream(
+        "SELECT * FROM users WHERE age > 40", chunk_size=chunk_size, chunks=True)
+
+# Consume several result sets at once, one chunk at a time; each
+# fetchmany yields to the loop, so the handlers interleave and only
+# one chunk per stream is alive at any moment
+async def stream_concurrently(*pairs):
+    async def consume(stream, handle):
+        async for chunk in stream:
+            handle(chunk)
+    await asyncio.gather(*(consume(stream, handle) for stream, handle in pairs))
+
+async def benchmark_memory():
+    async def eager():
+        all_users, older_users = await asyncio.gather(
+            async_fetch_users(), async_fetch_older_users())
+        return len(all_users), len(older_users)
+
+    async def streaming():
+        counts = [0, 0]
+        def count(index):
+            def handle(chunk):
+                counts[index] += len(chunk)
+            return handle
+        await stream_concurrently((async_stream_users(), count(0)),
+                                  (async_stream_older_users(), count(1)))
+        return tuple(counts)
+
+    for label, run in (("gather + fetchall", eager), ("stream_concurrently", streaming)):
+        tracemalloc.start()
+        counts = await run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:20} rows {counts}  peak {peak / 1024:9.1f} KiB")
+
+async def main():
+    # Owning the pool keeps its connections open for reuse until the end
+    async with get_pool("users.db"):
+        await fetch_concurrently()
+        await benchmark_memory()
+
 # Execute the concurrent fetch
 if __name__ == "__main__":
-    asyncio.run(fetch_concurrently())
+    asyncio.run(main())
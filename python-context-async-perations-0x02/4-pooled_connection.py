@@ -0,0 +1,136 @@
+import time
+import queue
+import sqlite3
+import threading
+
+DatabaseConnection = __import__('0-databaseconnection').DatabaseConnection
+
+
+class ConnectionPool:
+    def __init__(self, db_name, min_size=1, max_size=5, timeout=5.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "checkouts": 0, "waits": 0,
+                      "wait_time": 0.0, "in_use": 0, "peak_in_use": 0,
+                      "discarded": 0}
+        # Open min_size connections up front so the first blocks are warm
+        for _ in range(min_size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        with self._lock:
+            self.stats["created"] += 1
+        return sqlite3.connect(self.db_name, check_same_thread=False)
+
+    def get(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.timeout):
+                raise TimeoutError(
+                    f"no connection to {self.db_name} after {self.timeout}s")
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_time"] += time.perf_counter() - start
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["in_use"] += 1
+            self.stats["peak_in_use"] = max(self.stats["peak_in_use"],
+                                            self.stats["in_use"])
+        return conn
+
+    def put(self, conn, discard=False):
+        with self._lock:
+            self.stats["in_use"] -= 1
+        try:
+            if discard:
+                with self._lock:
+                    self.stats["discarded"] += 1
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name, **pool_options):
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name, **pool_options)
+        return pool
+
+
+class PooledDatabaseConnection:
+    def __init__(self, db_name, pool=None):
+        self.db_name = db_name
+        self.pool = pool or get_pool(db_name)
+        self.conn = None
+        self.cursor = None
+
+    def __enter__(self):
+        self.conn = self.pool.get()
+        self.cursor = self.conn.cursor()
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        self.cursor.close()
+        try:
+            if exc_type is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        except sqlite3.Error:
+            self.pool.put(conn, discard=True)
+            raise
+        self.pool.put(conn)
+
+
+def benchmark(db_name="users.db", blocks=5000):
+    for label, make in (("DatabaseConnection", DatabaseConnection),
+                        ("PooledDatabaseConnection", PooledDatabaseConnection)):
+        start = time.perf_counter()
+        for _ in range(blocks):
+            with make(db_name) as cursor:
+                cursor.execute("SELECT * FROM users WHERE id = ?", (1,))
+                cursor.fetchone()
+        elapsed = time.perf_counter() - start
+        print(f"{label:26} {blocks / elapsed:10.0f} blocks/sec")
+    print(get_pool(db_name).stats)
+
+
+def main():
+    with PooledDatabaseConnection('users.db') as cursor:
+        cursor.execute('SELECT * FROM users')
+        results = cursor.fetchall()
+        for row in results[:5]:
+            print(row)
+    benchmark()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import time
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import aiosqlite
+
+from async_pool import get_pool
+
+
+class _Worker:
+    # One thread, one sqlite connection opened on that thread and kept
+    # open; everything a `with` block does runs here in order.
+    def __init__(self, db_name):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.conn = self.executor.submit(sqlite3.connect, db_name).result()
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def close(self):
+        self.executor.submit(self.conn.close).result()
+        self.executor.shutdown()
+
+
+class AsyncCursor:
+    def __init__(self, worker, cursor):
+        self._worker = worker
+        self._cursor = cursor
+
+    async def execute(self, query, params=()):
+        await self._worker.run(self._cursor.execute, query, params)
+        return self
+
+    async def fetchone(self):
+        return await self._worker.run(self._cursor.fetchone)
+
+    async def fetchmany(self, size=1000):
+        return await self._worker.run(self._cursor.fetchmany, size)
+
+    async def fetchall(self):
+        return await self._worker.run(self._cursor.fetchall)
+
+
+class AsyncDatabaseConnection:
+    # async-with counterpart of DatabaseConnection: yields a cursor whose
+    # calls run on a warm worker thread; commits on success, rolls back
+    # if the block raised
+    def __init__(self, database):
+        self.database = database
+        self.worker = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        self.worker = await self.database.checkout()
+        try:
+            self.cursor = await self.worker.run(self.worker.conn.cursor)
+        except BaseException:
+            self.database.checkin(self.worker)
+            raise
+        return AsyncCursor(self.worker, self.cursor)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        worker, self.worker = self.worker, None
+        try:
+            await worker.run(_finish, worker.conn, self.cursor, exc_type is None)
+        finally:
+            self.database.checkin(worker)
+
+
+class AsyncExecuteQuery:
+    # async-with counterpart of ExecuteQuery: the query and fetchall run as
+    # one job on a worker thread and the rows are returned
+    def __init__(self, database, query, params=()):
+        self.database = database
+        self.query = query
+        self.params = params
+        self.worker = None
+
+    async def __aenter__(self):
+        self.worker = await self.database.checkout()
+        try:
+            return await self.worker.run(_fetch_all, self.worker.conn,
+                                         self.query, self.params)
+        except BaseException:
+            self.database.checkin(self.worker)
+            raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.database.checkin(self.worker)
+
+
+def _finish(conn, cursor, success):
+    cursor.close()
+    if success:
+        conn.commit()
+    else:
+        conn.rollback()
+
+
+def _fetch_all(conn, query, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.commit()
+
+
+class ThreadedDatabase:
+    def __init__(self, db_name="users.db", workers=4):
+        self.db_name = db_name
+        self.workers = workers
+        self._all = []
+        self._idle = None
+
+    async def checkout(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                worker = await asyncio.to_thread(_Worker, self.db_name)
+                self._all.append(worker)
+                self._idle.put_nowait(worker)
+        return await self._idle.get()
+
+    def checkin(self, worker):
+        self._idle.put_nowait(worker)
+
+    def connection(self):
+        return AsyncDatabaseConnection(self)
+
+    def execute_query(self, query, params=()):
+        return AsyncExecuteQuery(self, query, params)
+
+    def close(self):
+        for worker in self._all:
+            worker.close()
+        self._all.clear()
+        self._idle = None
+
+
+async def benchmark(db_name="users.db", queries=1000, concurrency=50):
+    query = "SELECT * FROM users WHERE id = ?"
+    database = ThreadedDatabase(db_name, workers=4)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def facade(user_id):
+        async with database.execute_query(query, (user_id,)) as rows:
+            return rows
+
+    async def aiosqlite_direct(user_id):
+        async with aiosqlite.connect(db_name) as db:
+            async with db.execute(query, (user_id,)) as cursor:
+                return await cursor.fetchall()
+
+    async def aiosqlite_pool(user_id):
+        async with get_pool(db_name, max_size=4).connection() as db:
+            async with db.execute(query, (user_id,)) as cursor:
+                return await cursor.fetchall()
+
+    async def limited(fetch, user_id):
+        async with semaphore:
+            return await fetch(user_id)
+
+    async with get_pool(db_name, max_size=4):
+        for label, fetch in (("thread facade", facade),
+                             ("aiosqlite, new connection", aiosqlite_direct),
+                             ("aiosqlite, pooled", aiosqlite_pool)):
+            await fetch(1)
+            start = time.perf_counter()
+            await asyncio.gather(*(limited(fetch, i % 1000 + 1) for i in range(queries)))
+            elapsed = time.perf_counter() - start
+            print(f"{label:26} {queries / elapsed:8.0f} queries/sec")
+    database.close()
+
+
+async def main():
+    database = ThreadedDatabase("users.db")
+    async with database.connection() as cursor:
+        await cursor.execute("SELECT * FROM users WHERE age > ?", (25,))
+        print(await cursor.fetchone())
+    async with database.execute_query("SELECT COUNT(*) FROM users") as rows:
+        print(rows)
+    database.close()
+    await benchmark()
+
+if __name__ == "__main__":
+    asyncio.run(main())
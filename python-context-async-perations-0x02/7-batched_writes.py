@@ -0,0 +1,150 @@
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from itertools import groupby
+
+DatabaseConnection = __import__('0-databaseconnection').DatabaseConnection
+
+
+class BatchedWriter:
+    # Buffers execute() calls and writes them with executemany inside one
+    # transaction once max_batch statements are queued or the oldest one
+    # has waited max_delay seconds (a timer flushes a writer that has gone
+    # quiet), and on a clean exit.  If the block raises, unflushed writes
+    # are dropped; an error in a timer flush is raised by the next
+    # execute() or on exit.
+    # tune=True switches the database file to WAL with synchronous=NORMAL.
+    # WAL is a property of the file: it stays on for every other
+    # connection after the writer closes.
+    def __init__(self, db_name, max_batch=1000, max_delay=0.5, tune=False):
+        self.db_name = db_name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.tune = tune
+        self.conn = None
+        self._buffer = []
+        self._timer = None
+        self._error = None
+        self._lock = threading.RLock()
+        self.stats = {"statements": 0, "flushes": 0}
+
+    def __enter__(self):
+        # The timer flushes from its own thread
+        self.conn = sqlite3.connect(self.db_name, isolation_level=None,
+                                    check_same_thread=False)
+        if self.tune:
+            # WAL: commits append to the log instead of rewriting pages;
+            # NORMAL: fsync at checkpoints rather than on every commit
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        return self
+
+    def execute(self, query, params=()):
+        with self._lock:
+            self._raise_timer_error()
+            self._buffer.append((query, params))
+            if len(self._buffer) >= self.max_batch:
+                self.flush()
+            elif len(self._buffer) == 1 and self.max_delay is not None:
+                self._timer = threading.Timer(self.max_delay, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_due(self):
+        with self._lock:
+            if self.conn is None:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                self._error = e
+
+    def _raise_timer_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            buffer, self._buffer = self._buffer, []
+            self.conn.execute("BEGIN")
+            try:
+                # Consecutive statements with the same SQL go in one
+                # executemany; order between different statements is kept
+                for query, group in groupby(buffer, key=lambda item: item[0]):
+                    self.conn.executemany(query,
+                                          [params for _, params in group])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.stats["statements"] += len(buffer)
+            self.stats["flushes"] += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._lock:
+            if self.conn is None:
+                return
+            try:
+                if exc_type is None:
+                    self.flush()
+                    self._raise_timer_error()
+                else:
+                    self._buffer.clear()
+                    if self._timer is not None:
+                        self._timer.cancel()
+                        self._timer = None
+            finally:
+                self.conn.close()
+                self.conn = None
+
+
+def benchmark(db_name="users.db", inserts=2000):
+    query = "INSERT INTO users (name, email, age) VALUES (?, ?, ?)"
+    rows = [(f"bench{i}", f"bench{i}@example.com", 20 + i % 60)
+            for i in range(inserts)]
+
+    def one_block_per_insert(path):
+        for row in rows:
+            with DatabaseConnection(path) as cursor:
+                cursor.execute(query, row)
+
+    def batched(max_batch, tune):
+        def run(path):
+            with BatchedWriter(path, max_batch=max_batch, tune=tune) as writer:
+                for row in rows:
+                    writer.execute(query, row)
+        return run
+
+    workdir = tempfile.mkdtemp()
+    try:
+        variants = [("one with-block per insert", one_block_per_insert)]
+        for max_batch in (50, 1000):
+            variants.append((f"batch {max_batch}", batched(max_batch, False)))
+            variants.append((f"batch {max_batch} + WAL/NORMAL",
+                             batched(max_batch, True)))
+        for number, (label, run) in enumerate(variants):
+            # Each variant writes to its own copy; WAL sticks to the file
+            path = os.path.join(workdir, f"{number}.db")
+            shutil.copyfile(db_name, path)
+            start = time.perf_counter()
+            run(path)
+            elapsed = time.perf_counter() - start
+            print(f"{label:28} {inserts / elapsed:10.0f} inserts/sec")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def main():
+    benchmark()
+
+if __name__ == "__main__":
+    main()
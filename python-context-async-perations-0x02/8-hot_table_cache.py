@@ -0,0 +1,182 @@
+import time
+import sqlite3
+import operator
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+from scan_fusion import column_affinity, where_filter
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _column_array(values):
+    # Integer and float columns without NULLs are packed into typed
+    # arrays; anything else stays a list
+    if values and all(type(value) is int for value in values):
+        return array("q", values)
+    if values and all(type(value) is float for value in values):
+        return array("d", values)
+    return list(values)
+
+
+class HotTable:
+    # In-process, read-only replica of one table: one array per column and
+    # a sorted index on `index_column`.  Before answering, it compares
+    # PRAGMA data_version on its own long-lived connection; the counter
+    # moves whenever another connection commits, and the table is
+    # reloaded.
+    def __init__(self, db_name="users.db", table="users", index_column="age"):
+        self.db_name = db_name
+        self.table = table
+        self.index_column = index_column
+        # Autocommit, so no read transaction pins data_version in place
+        self._conn = sqlite3.connect(db_name, check_same_thread=False,
+                                     isolation_level=None)
+        self._lock = threading.Lock()
+        self._version = None
+        self.columns = {}
+        self.affinities = {}
+        self.names = []
+        self.size = 0
+        self.reloads = 0
+        self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version:
+                return False
+            cursor = self._conn.execute(f"SELECT * FROM {self.table}")
+            names = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            columns = {name: _column_array([row[i] for row in rows])
+                       for i, name in enumerate(names)}
+            keys = columns[self.index_column]
+            order = sorted((i for i in range(len(rows)) if keys[i] is not None),
+                           key=keys.__getitem__)
+            self._sorted_keys = [keys[i] for i in order]
+            self._sorted_rows = array("l", order)
+            self.affinities = {
+                row[1]: column_affinity(row[2]) for row in
+                self._conn.execute(f"PRAGMA table_info({self.table})")}
+            self.names, self.columns, self.size = names, columns, len(rows)
+            self._version = version
+            self.reloads += 1
+            return True
+
+    def _positions(self, column, op, value):
+        if column == self.index_column and op != "!=":
+            keys, rows = self._sorted_keys, self._sorted_rows
+            if op == ">":
+                return rows[bisect_right(keys, value):]
+            if op == ">=":
+                return rows[bisect_left(keys, value):]
+            if op == "<":
+                return rows[:bisect_left(keys, value)]
+            if op == "<=":
+                return rows[:bisect_right(keys, value)]
+            return rows[bisect_left(keys, value):bisect_right(keys, value)]
+        compare = OPERATORS[op]
+        values = self.columns[column]
+        return [i for i in range(self.size)
+                if values[i] is not None and compare(values[i], value)]
+
+    def _check(self, column, op, value):
+        # True if the replica can answer `column op value` exactly as
+        # SQLite would; False if SQLite has to (a NULL, or a value it would
+        # convert to the column's affinity first, e.g. age > '40')
+        if op not in OPERATORS:
+            raise ValueError(f"unsupported operator: {op!r}")
+        if column not in self.columns:
+            raise ValueError(f"unknown column: {column!r}")
+        return where_filter((column, op, value), self.names,
+                            self.affinities) is not None
+
+    def _sql(self, select, column, op, value):
+        query = f"SELECT {select} FROM {self.table} WHERE {column} {op} ?"
+        with ExecuteQuery(self.db_name, query, (value,)) as rows:
+            return rows
+
+    def select(self, column=None, op=None, value=None):
+        # Rows matching `column op value` (all rows if no predicate), in
+        # table order, as tuples like cursor.fetchall() would return
+        self.refresh()
+        if column is not None and not self._check(column, op, value):
+            return self._sql("*", column, op, value)
+        with self._lock:
+            if column is None:
+                positions = range(self.size)
+            else:
+                positions = sorted(self._positions(column, op, value))
+            columns = [self.columns[name] for name in self.names]
+            if not positions:
+                return []
+            if len(positions) == 1:
+                return [tuple(values[positions[0]] for values in columns)]
+            pick = operator.itemgetter(*positions)
+            return list(zip(*(pick(values) for values in columns)))
+
+    def count(self, column, op, value):
+        self.refresh()
+        if not self._check(column, op, value):
+            return self._sql("count(*)", column, op, value)[0][0]
+        with self._lock:
+            return len(self._positions(column, op, value))
+
+    def close(self):
+        self._conn.close()
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_hot_table(db_name="users.db", table="users", index_column="age"):
+    with _tables_lock:
+        key = (db_name, table, index_column)
+        if key not in _tables:
+            _tables[key] = HotTable(db_name, table, index_column)
+        return _tables[key]
+
+
+def benchmark(db_name="users.db", runs=200):
+    hot = get_hot_table(db_name)
+    query = "SELECT * FROM users WHERE age > ?"
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        with ExecuteQuery(db_name, query, (40,)) as expected:
+            pass
+    sql_time = (time.perf_counter() - start) / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        rows = hot.select("age", ">", 40)
+    hot_time = (time.perf_counter() - start) / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        hot.count("age", ">", 40)
+    count_time = (time.perf_counter() - start) / runs
+
+    assert rows == expected
+    print(f"ExecuteQuery age > 40:  {sql_time * 1000:7.3f}ms")
+    print(f"HotTable.select:        {hot_time * 1000:7.3f}ms ({len(rows)} rows)")
+    print(f"HotTable.count:         {count_time * 1000:7.3f}ms")
+    print(f"reloads: {hot.reloads}")
+
+
+def main():
+    benchmark()
+
+if __name__ == "__main__":
+    main()
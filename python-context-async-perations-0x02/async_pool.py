@@ -0,0 +1,207 @@
+import time
+import asyncio
+import sqlite3
+import weakref
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+class AsyncConnectionPool:
+    # Every aiosqlite connection owns a worker thread, so the pool caps both
+    # connections and threads at max_size.  Waiters are served strictly in
+    # arrival order, and an idle connection that has not been used for
+    # health_check_after seconds is pinged before it is handed out.
+    # Those threads are not daemons: an idle connection left open when the
+    # loop ends keeps the interpreter alive.  So connections are only kept
+    # for reuse while someone owns the pool (`async with pool:`, which
+    # closes them on exit); otherwise each one is closed on release.
+    def __init__(self, db_name, max_size=5, health_check_after=30.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.health_check_after = health_check_after
+        self._idle = []
+        self._waiters = deque()
+        self._in_use = 0
+        self._owners = 0
+        self.stats = {"created": 0, "checkouts": 0, "waits": 0,
+                      "discarded": 0}
+
+    async def _reserve_slot(self):
+        if self._in_use < self.max_size and not self._waiters:
+            self._in_use += 1
+            return
+        self.stats["waits"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to us, so nobody can jump
+            # the queue between the wake-up and our turn
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            elif waiter in self._waiters:
+                # _release_slot may already have popped (and skipped) it
+                self._waiters.remove(waiter)
+            raise
+
+    def _release_slot(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_use -= 1
+
+    async def _healthy(self, conn, idle_since):
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        return await self.is_healthy(conn)
+
+    @staticmethod
+    async def is_healthy(conn):
+        try:
+            await conn.execute("SELECT 1")
+            return True
+        except (sqlite3.Error, ValueError):
+            return False
+
+    async def acquire(self):
+        await self._reserve_slot()
+        try:
+            while self._idle:
+                conn, idle_since = self._idle.pop()
+                if await self._healthy(conn, idle_since):
+                    self.stats["checkouts"] += 1
+                    return conn
+                await self._discard(conn)
+            conn = await aiosqlite.connect(self.db_name)
+            self.stats["created"] += 1
+            self.stats["checkouts"] += 1
+            return conn
+        except BaseException:
+            self._release_slot()
+            raise
+
+    async def release(self, conn, discard=False):
+        try:
+            if discard:
+                await self._discard(conn)
+            elif not self._owners:
+                await conn.close()
+            else:
+                if conn.in_transaction:
+                    await conn.rollback()
+                self._idle.append((conn, time.monotonic()))
+        except (sqlite3.Error, ValueError):
+            await self._discard(conn)
+        finally:
+            self._release_slot()
+
+    async def _discard(self, conn):
+        self.stats["discarded"] += 1
+        try:
+            await conn.close()
+        except (sqlite3.Error, ValueError):
+            pass
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            # An error from the caller's code leaves the connection usable;
+            # only drop it if it no longer answers
+            await self.release(conn, discard=not await self.is_healthy(conn))
+            raise
+        await self.release(conn)
+
+    async def stream(self, sql, params=(), chunk_size=500, chunks=False):
+        # Async generator over the result: rows (or lists of rows with
+        # chunks=True) are pulled with fetchmany, so only one chunk is in
+        # memory at a time.  The connection goes back to the pool when the
+        # generator is exhausted or closed.
+        conn = await self.acquire()
+        try:
+            async with conn.execute(sql, params) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if chunks:
+                        yield rows
+                    else:
+                        for row in rows:
+                            yield row
+        finally:
+            await self.release(conn)
+
+    async def __aenter__(self):
+        self._owners += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._owners -= 1
+        if not self._owners:
+            await self.close()
+
+    async def close(self):
+        while self._idle:
+            conn, _ = self._idle.pop()
+            await conn.close()
+
+
+# Pools hold loop-bound futures, so each running event loop gets its own
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_pool(db_name, **pool_options):
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    pool = pools.get(db_name)
+    if pool is None:
+        pool = pools[db_name] = AsyncConnectionPool(db_name, **pool_options)
+    return pool
+
+
+async def close_pools():
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.close()
+
+
+async def benchmark(db_name="users.db", queries=300):
+    query = "SELECT * FROM users WHERE age > 40"
+    peak_threads = 0
+
+    async def direct():
+        nonlocal peak_threads
+        async with aiosqlite.connect(db_name) as db:
+            peak_threads = max(peak_threads, threading.active_count())
+            async with db.execute(query) as cursor:
+                return await cursor.fetchall()
+
+    async def pooled():
+        nonlocal peak_threads
+        async with get_pool(db_name).connection() as db:
+            peak_threads = max(peak_threads, threading.active_count())
+            async with db.execute(query) as cursor:
+                return await cursor.fetchall()
+
+    async with get_pool(db_name) as pool:
+        for label, fetch in (("connection per query", direct), ("pool", pooled)):
+            peak_threads = threading.active_count()
+            start = time.perf_counter()
+            await asyncio.gather(*(fetch() for _ in range(queries)))
+            elapsed = time.perf_counter() - start
+            print(f"{label:22} {elapsed * 1000:8.1f}ms for {queries} queries, "
+                  f"peak threads {peak_threads}")
+        print(pool.stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
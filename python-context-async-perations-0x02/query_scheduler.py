@@ -0,0 +1,101 @@
+import heapq
+import asyncio
+import itertools
+
+from async_pool import get_pool
+
+HIGH, NORMAL, LOW = 0, 1, 2
+
+
+class QueryScheduler:
+    # Runs at most `limit` queries at once.  Queries waiting for a slot are
+    # started by priority class (HIGH before NORMAL before LOW) and in
+    # submission order within a class.  A timeout covers the time spent
+    # waiting for a slot as well as running.
+    def __init__(self, limit=4, db_name="users.db"):
+        self.limit = limit
+        self.db_name = db_name
+        self._running = 0
+        self._waiters = []
+        self._order = itertools.count()
+        self._tasks = set()
+
+    async def _acquire(self, priority):
+        if self._running < self.limit and not self._waiters:
+            self._running += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Already handed a slot: pass it on.  Otherwise the cancelled
+            # waiter is skipped when it reaches the top of the heap.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    async def _run(self, coro, priority):
+        await self._acquire(priority)
+        try:
+            return await coro
+        finally:
+            self._release()
+
+    def submit(self, coro, priority=NORMAL, timeout=None):
+        run = self._run(coro, priority)
+        if timeout is not None:
+            run = asyncio.wait_for(run, timeout)
+        task = asyncio.ensure_future(run)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # A query cancelled or timed out before it got a slot never
+        # started; close it so it is not reported as never awaited
+        task.add_done_callback(lambda _: coro.close())
+        return task
+
+    def query(self, sql, params=(), priority=NORMAL, timeout=None):
+        return self.submit(self._fetch(sql, params), priority, timeout)
+
+    async def _fetch(self, sql, params):
+        async with get_pool(self.db_name).connection() as db:
+            async with db.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def as_completed(self, tasks):
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+
+    async def gather(self, tasks, return_exceptions=False):
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+    def cancel_all(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+async def main():
+    scheduler = QueryScheduler(limit=4)
+    tasks = [scheduler.query("SELECT * FROM users WHERE age > ?", (age,),
+                             priority=LOW)
+             for age in range(18, 80)]
+    tasks.append(scheduler.query("SELECT COUNT(*) FROM users",
+                                 priority=HIGH, timeout=1.0))
+    done = 0
+    async with get_pool(scheduler.db_name):
+        async for rows in scheduler.as_completed(tasks):
+            done += 1
+            if rows and len(rows[0]) == 1:
+                print(f"count query finished after {done} of {len(tasks)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+import re
+import time
+import asyncio
+import operator
+
+from async_pool import get_pool
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _check_identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"invalid identifier: {name!r}")
+    return name
+
+
+def where_sql(where):
+    # (column, op, value) -> ("WHERE column op ?", (value,))
+    if where is None:
+        return "", ()
+    column, op, value = where
+    if op not in OPERATORS:
+        raise ValueError(f"unsupported operator: {op!r}")
+    return f" WHERE {_check_identifier(column)} {op} ?", (value,)
+
+
+def column_affinity(declared_type):
+    # SQLite's rules for a column's type affinity from its declared type
+    declared = (declared_type or "").upper()
+    if "INT" in declared:
+        return "INTEGER"
+    if any(name in declared for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if not declared or "BLOB" in declared:
+        return "BLOB"
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+
+def where_filter(where, columns, affinities):
+    # Python predicate equivalent to `WHERE column op value`, or None when
+    # only SQLite can answer it faithfully: an unknown column, a NULL
+    # value, or a value SQLite would convert to the column's affinity
+    # before comparing (e.g. age > '40')
+    if where is None:
+        return lambda row: True
+    column, op, value = where
+    if column not in columns or value is None:
+        return None
+    affinity = affinities.get(column, "BLOB")
+    if isinstance(value, (int, float)):
+        if affinity not in ("INTEGER", "REAL", "NUMERIC"):
+            return None
+    elif not (isinstance(value, str) and affinity == "TEXT"):
+        return None
+    index = columns.index(column)
+    compare = OPERATORS[op]
+    return lambda row: row[index] is not None and compare(row[index], value)
+
+
+async def table_affinities(db, table):
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        return {row[1]: column_affinity(row[2])
+                for row in await cursor.fetchall()}
+
+
+class ScanFusion:
+    # Queries against the same table that are issued together (in the same
+    # loop iteration, or within `window` seconds) share one full scan: the
+    # rows are read once and each query's predicate picks out its own.
+    # A predicate Python can't evaluate exactly as SQLite would (see
+    # where_filter, or a TypeError on a row's value) is answered by its
+    # own SQL query instead, and only that query sees its error.
+    def __init__(self, db_name="users.db", window=0.0, chunk_size=500):
+        self.db_name = db_name
+        self.window = window
+        self.chunk_size = chunk_size
+        self._pending = {}
+        self.stats = {"queries": 0, "scans": 0, "fallbacks": 0}
+
+    @property
+    def scans_saved(self):
+        return self.stats["queries"] - self.stats["scans"] - self.stats["fallbacks"]
+
+    async def select(self, table, where=None):
+        _check_identifier(table)
+        where_sql(where)
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        consumers = self._pending.get(table)
+        if consumers is None:
+            consumers = self._pending[table] = []
+            loop.create_task(self._scan(table))
+        consumers.append((where, result))
+        self.stats["queries"] += 1
+        return await result
+
+    async def _scan(self, table):
+        await asyncio.sleep(self.window)
+        consumers = self._pending.pop(table)
+        if len(consumers) == 1:
+            # Nothing to share: a lone query runs as its own WHERE query
+            self._fall_back(table, *consumers[0])
+            return
+        fused = {}
+        try:
+            async with get_pool(self.db_name).connection() as db:
+                affinities = await table_affinities(db, table)
+                columns = list(affinities)
+                for number, (where, _) in enumerate(consumers):
+                    keep = where_filter(where, columns, affinities)
+                    if keep is not None:
+                        fused[number] = (keep, [])
+                if fused:
+                    async with db.execute(f"SELECT * FROM {table}") as cursor:
+                        while fused:
+                            rows = await cursor.fetchmany(self.chunk_size)
+                            if not rows:
+                                break
+                            for number, (keep, result) in list(fused.items()):
+                                try:
+                                    result.extend(filter(keep, rows))
+                                except TypeError:
+                                    # Mixed types in the column
+                                    del fused[number]
+        except Exception as e:
+            for _, future in consumers:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Only a scan that answered someone counts; the rest is fallbacks
+        if fused:
+            self.stats["scans"] += 1
+        for number, (where, future) in enumerate(consumers):
+            if number in fused:
+                if not future.done():
+                    future.set_result(fused[number][1])
+            else:
+                self._fall_back(table, where, future)
+
+    def _fall_back(self, table, where, future):
+        self.stats["fallbacks"] += 1
+        asyncio.get_running_loop().create_task(
+            self._select_one(table, where, future))
+
+    async def _select_one(self, table, where, future):
+        try:
+            rows = await select_separately(self.db_name, table, where)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(rows)
+
+
+async def select_separately(db_name, table, where=None):
+    clause, params = where_sql(where)
+    async with get_pool(db_name).connection() as db:
+        async with db.execute(f"SELECT * FROM {_check_identifier(table)}{clause}",
+                              params) as cursor:
+            return await cursor.fetchall()
+
+
+async def benchmark(db_name="users.db", rounds=20):
+    # The two fetch_concurrently queries plus a few more age bands
+    predicates = [None, ("age", ">", 40), ("age", "<", 30),
+                  ("age", ">=", 60), ("age", "=", 50)]
+    fusion = ScanFusion(db_name)
+
+    async with get_pool(db_name):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            separate = await asyncio.gather(
+                *(select_separately(db_name, "users", where) for where in predicates))
+        separate_time = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fused = await asyncio.gather(
+                *(fusion.select("users", where) for where in predicates))
+        fused_time = (time.perf_counter() - start) / rounds
+
+    assert [sorted(rows) for rows in fused] == [sorted(rows) for rows in separate]
+    print(f"separate scans: {separate_time * 1000:7.2f}ms per round "
+          f"({len(predicates)} scans)")
+    print(f"fused scan:     {fused_time * 1000:7.2f}ms per round (1 scan)")
+    print(f"scans saved: {fusion.scans_saved} of {fusion.stats['queries']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -2,13 +2,16 @@ import sqlite3
 import functools
 from datetime import datetime   # required by checker
 
+from tracing import span
+
 def log_queries(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         query = kwargs.get("query") or (args[0] if args else None)
         if query:
             print(f"[{datetime.now()}] Executing query: {query}")
-        return func(*args, **kwargs)
+        with span("execute", query=query):
+            return func(*args, **kwargs)
     return wrapper
 
 @log_queries
@@ -1,10 +1,14 @@
 import sqlite3
 import functools
 
+from tracing import span, traced_connection
+
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
+        with span("connect"):
+            conn = sqlite3.connect("users.db")
+        conn = traced_connection(conn)
         try:
             return func(conn, *args, **kwargs)
         finally:
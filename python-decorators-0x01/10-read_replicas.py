@@ -0,0 +1,211 @@
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import functools
+import itertools
+import threading
+from pathlib import Path
+
+DB_PATH = "users.db"
+
+
+class ReplicaRouter:
+    # Reads go to read-only connections, writes to the primary file.
+    # Without snapshots the read-only connections open the primary itself
+    # (mode=ro URI); with snapshots every replica is its own file, so
+    # readers never share a lock with the writer.  Snapshots are retaken
+    # once they are max_age seconds old or max_writes writes behind (the
+    # first reader to notice pays for the copy), and a thread that has
+    # written reads the primary until the next refresh, so it always
+    # sees its own writes.
+    def __init__(self, primary=DB_PATH, snapshots=0, max_age=1.0,
+                 max_writes=None):
+        self.primary = primary
+        self.replicas = [f"{primary}.replica{i}" for i in range(snapshots)]
+        self.max_age = max_age
+        self.max_writes = max_writes
+        self.refreshes = 0
+        self._next = itertools.count()
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        self._writes = 0
+        self._refreshed_at = 0.0
+        if self.replicas:
+            self.refresh_snapshots()
+
+    def refresh_snapshots(self):
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        started = time.monotonic()
+        writes = self._writes
+        source = sqlite3.connect(self.primary)
+        try:
+            for path in self.replicas:
+                # Copy aside and swap in, so readers holding the old file
+                # open never block the copy
+                tmp_path = f"{path}.tmp"
+                target = sqlite3.connect(tmp_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                os.replace(tmp_path, path)
+        finally:
+            source.close()
+        self._writes -= writes
+        self._refreshed_at = started
+        self._generation += 1
+        self.refreshes += 1
+
+    def _stale(self):
+        if self.max_age is not None and \
+                time.monotonic() - self._refreshed_at >= self.max_age:
+            return True
+        return self.max_writes is not None and self._writes >= self.max_writes
+
+    def note_write(self):
+        with self._refresh_lock:
+            self._writes += 1
+            self._local.wrote_in = self._generation
+
+    def connect_read(self):
+        path = self.primary
+        if self.replicas:
+            if self._stale() and self._refresh_lock.acquire(blocking=False):
+                try:
+                    if self._stale():
+                        self._refresh()
+                finally:
+                    self._refresh_lock.release()
+            if getattr(self._local, "wrote_in", -1) != self._generation:
+                path = self.replicas[next(self._next) % len(self.replicas)]
+        return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro",
+                               uri=True)
+
+    def connect_write(self):
+        return sqlite3.connect(self.primary)
+
+    def remove_snapshots(self):
+        for path in self.replicas:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+router = ReplicaRouter()
+
+
+def with_db_connection(func):
+    # functools.wraps copies `writes` up through any decorators in between
+    writes = getattr(func, "writes", False)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current = router
+        conn = current.connect_write() if writes else current.connect_read()
+        try:
+            result = func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+        if writes:
+            current.note_write()
+        return result
+    return wrapper
+
+def writes_to_primary(func):
+    func.writes = True
+    return func
+
+def transactional(func):
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        try:
+            result = func(conn, *args, **kwargs)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            raise e
+    return writes_to_primary(wrapper)
+
+@with_db_connection
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+@with_db_connection
+def fetch_all_users(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+@with_db_connection
+@transactional
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+def _run_workload(readers, seconds):
+    stop = time.perf_counter() + seconds
+    read_times, write_times = [], []
+
+    def read_loop():
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            fetch_all_users()
+            read_times.append(time.perf_counter() - start)
+
+    def write_loop():
+        user_id = 0
+        while time.perf_counter() < stop:
+            user_id = user_id % 1000 + 1
+            start = time.perf_counter()
+            update_user_email(user_id=user_id, new_email=f"w{user_id}@example.com")
+            write_times.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    threads.append(threading.Thread(target=write_loop))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return read_times, write_times
+
+
+def benchmark(readers=4, snapshots=2, seconds=3, max_age=0.5):
+    # Runs against a copy so users.db keeps its data
+    global router
+    workdir = tempfile.mkdtemp()
+    primary = os.path.join(workdir, "users.db")
+    shutil.copyfile(DB_PATH, primary)
+    original = router
+    try:
+        for label, replicas in (("primary only", 0),
+                                (f"{snapshots} snapshot replicas", snapshots)):
+            router = ReplicaRouter(primary, snapshots=replicas, max_age=max_age)
+            reads, writes = _run_workload(readers, seconds)
+            router.remove_snapshots()
+            staleness = (f"reads up to {max_age}s stale, "
+                         f"{router.refreshes} refreshes" if replicas else
+                         "reads always fresh")
+            print(f"{label:20} reads/s {len(reads) / seconds:8.0f}  "
+                  f"writes/s {len(writes) / seconds:8.0f}  "
+                  f"max write wait {max(writes) * 1000:7.1f}ms  "
+                  f"max read wait {max(reads) * 1000:7.1f}ms  ({staleness})")
+    finally:
+        router = original
+        shutil.rmtree(workdir)
+
+
+# Example usage
+if __name__ == "__main__":
+    print(get_user_by_id(user_id=1))
+    update_user_email(user_id=1, new_email="test@example.com")
+    print(get_user_by_id(user_id=1))
+    benchmark()
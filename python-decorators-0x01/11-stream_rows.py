@@ -0,0 +1,92 @@
+import sqlite3
+import functools
+import tracemalloc
+
+DB_PATH = "users.db"
+
+
+def stream_rows(chunk_size=500, chunks=False):
+    # Takes the place of @with_db_connection for query functions that
+    # return their cursor: the call becomes a generator that pulls rows
+    # with fetchmany and keeps the connection open until it is exhausted,
+    # closed, or garbage collected.
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                cursor = func(conn, *args, **kwargs)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if chunks:
+                        yield rows
+                    else:
+                        yield from rows
+            finally:
+                conn.close()
+        return wrapper
+    return decorator
+
+
+def with_db_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+@stream_rows(chunk_size=500)
+def stream_all_users(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor
+
+
+@stream_rows(chunk_size=500)
+def stream_users(conn, query, params=()):
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor
+
+
+@with_db_connection
+def fetch_all_users(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+def peak_memory(consume):
+    tracemalloc.start()
+    try:
+        consume()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark():
+    def eager():
+        for _ in fetch_all_users():
+            pass
+
+    def streaming():
+        for _ in stream_all_users():
+            pass
+
+    for label, consume in (("fetchall", eager), ("stream_rows", streaming)):
+        print(f"{label:12} peak {peak_memory(consume) / 1024:10.1f} KiB")
+
+
+# Example usage
+if __name__ == "__main__":
+    for user in stream_users("SELECT * FROM users WHERE age > ?", (40,)):
+        print(user)
+        break
+    benchmark()
@@ -0,0 +1,203 @@
+import time
+import sqlite3
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DB_PATH = "users.db"
+
+
+class Batch:
+    # Explicit batch scope: load() only queues the key and hands back a
+    # Future; the whole batch runs as one query when the block exits (or
+    # when dispatch() is called inside it).
+    def __init__(self, loader):
+        self.loader = loader
+        self._queue = {}
+
+    def load(self, key):
+        key = self.loader.normalize(key)
+        future = self._queue.get(key)
+        if future is None:
+            future = self._queue[key] = Future()
+        return future
+
+    def dispatch(self):
+        queue, self._queue = self._queue, {}
+        self.loader.resolve(queue)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.dispatch()
+        else:
+            for future in self._queue.values():
+                future.cancel()
+
+
+def integer_key(key):
+    # Keys as SQLite's INTEGER affinity sees them: "1" and 1.0 match id 1,
+    # anything that isn't a whole number is left alone (and matches nothing)
+    if isinstance(key, str):
+        try:
+            return int(key.strip())
+        except ValueError:
+            return key
+    if isinstance(key, float) and key.is_integer():
+        return int(key)
+    return key
+
+
+class BatchLoader:
+    # DataLoader-style batching: keys requested by different threads within
+    # `window` seconds are collected and fetched with a single
+    # load_many(keys) call, then each caller gets its own row back.  The
+    # window is only waited out when other callers are already inside
+    # load(); a lone caller (e.g. a plain loop) is dispatched at once.
+    def __init__(self, load_many, window=0.002, max_batch=500,
+                 key_type=None):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch = max_batch
+        self.key_type = key_type
+        self._queue = {}
+        self._scheduled = False
+        self._active = 0
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def normalize(self, key):
+        return key if self.key_type is None else self.key_type(key)
+
+    def load(self, key):
+        key = self.normalize(key)
+        with self._lock:
+            self._active += 1
+            future = self._queue.get(key)
+            if future is None:
+                future = self._queue[key] = Future()
+            leader = not self._scheduled
+            self._scheduled = True
+            wait = self._active > 1
+        try:
+            if leader:
+                if wait:
+                    time.sleep(self.window)
+                with self._lock:
+                    queue, self._queue = self._queue, {}
+                    self._scheduled = False
+                self.resolve(queue)
+            return future.result()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def resolve(self, queue):
+        keys = list(queue)
+        try:
+            for start in range(0, len(keys), self.max_batch):
+                part = keys[start:start + self.max_batch]
+                rows = self.load_many(part)
+                self.batches += 1
+                for key in part:
+                    queue[key].set_result(rows.get(key))
+        except Exception as e:
+            for future in queue.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    def batch(self):
+        return Batch(self)
+
+
+def with_db_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+def batch_loader(window=0.002, max_batch=500, key_type=None):
+    # Decorates a function that loads many keys at once, fn(conn, keys) ->
+    # {key: row}, and turns it into a single-key lookup fn(key).  key_type
+    # maps each key to the type load_many's dict is keyed by.
+    def decorator(load_many):
+        loader = BatchLoader(with_db_connection(load_many), window,
+                             max_batch, key_type)
+
+        @functools.wraps(load_many)
+        def wrapper(key=None, **kwargs):
+            if key is None and len(kwargs) == 1:
+                (key,) = kwargs.values()
+            return loader.load(key)
+        wrapper.loader = loader
+        wrapper.batch = loader.batch
+        return wrapper
+    return decorator
+
+
+@batch_loader(key_type=integer_key)
+def get_user_by_id(conn, user_ids):
+    placeholders = ",".join("?" * len(user_ids))
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM users WHERE id IN ({placeholders})", user_ids)
+    return {row[0]: row for row in cursor.fetchall()}
+
+
+@with_db_connection
+def get_single_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def benchmark(n=1000, threads=50):
+    ids = list(range(1, n + 1))
+
+    start = time.perf_counter()
+    single = [get_single_user_by_id(user_id=i) for i in ids]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with get_user_by_id.batch() as batch:
+        futures = [batch.load(i) for i in ids]
+    batched = [future.result() for future in futures]
+    batch_time = time.perf_counter() - start
+    assert batched == single
+
+    before = get_user_by_id.loader.batches
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        windowed = list(pool.map(get_user_by_id, ids))
+    window_time = time.perf_counter() - start
+    assert windowed == single
+    window_batches = get_user_by_id.loader.batches - before
+
+    before = get_user_by_id.loader.batches
+    start = time.perf_counter()
+    looped = [get_user_by_id(user_id=i) for i in ids]
+    loop_time = time.perf_counter() - start
+    assert looped == single
+    loop_batches = get_user_by_id.loader.batches - before
+
+    rows = [
+        (f"{n} single lookups", single_time, n),
+        (f"{n} loader calls, 1 thread", loop_time, loop_batches),
+        ("batch scope", batch_time, -(-n // get_user_by_id.loader.max_batch)),
+        (f"{threads} threads, 2ms window", window_time, window_batches),
+    ]
+    for label, elapsed, queries in rows:
+        print(f"{label:26} {elapsed * 1000:8.1f}ms ({queries} queries)")
+
+
+# Example usage
+if __name__ == "__main__":
+    print(get_user_by_id(user_id=1))
+    print(get_user_by_id("1"))
+    benchmark()
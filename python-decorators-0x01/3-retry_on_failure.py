@@ -1,31 +1,106 @@
 import time
+import random
 import sqlite3
 import functools
+import threading
+
+from tracing import span, traced_connection
+
+# Errors that go away on their own if we wait a bit; anything else
+# (syntax errors, missing tables, constraint violations) is raised at once
+RETRYABLE_MESSAGES = (
+    "database is locked",
+    "database table is locked",
+    "database is busy",
+)
+
+
+def is_retryable(error):
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return any(text in message for text in RETRYABLE_MESSAGES)
+
+
+class RetryBudget:
+    # Process-wide token bucket shared by every decorated function: each
+    # successful call earns `ratio` of a retry, each retry spends one.  When
+    # the database keeps failing the bucket drains and callers fail fast
+    # instead of piling more retries onto it.
+    def __init__(self, ratio=0.2, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+retry_budget = RetryBudget()
+
+
+def backoff_delay(attempt, delay, max_delay):
+    # Exponential backoff with full jitter: uniform in [0, delay * 2^n]
+    return random.uniform(0, min(max_delay, delay * 2 ** (attempt - 1)))
+
+
+def should_retry(error, attempt, retries, delay=2, max_delay=30,
+                 retry_if=is_retryable, budget=retry_budget):
+    # Decides what happens after failed attempt number `attempt`: the
+    # seconds to back off before the next one, or None to re-raise.  Shared
+    # by every retrying wrapper; they only differ in how they sleep.
+    if attempt >= retries or not retry_if(error):
+        return None
+    if budget is not None and not budget.withdraw():
+        print("[Retry] Budget exhausted, giving up")
+        return None
+    # Only announced once a retry is really going to happen
+    print(f"[Retry {attempt}/{retries}] Error: {error}")
+    return backoff_delay(attempt, delay, max_delay)
+
 
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
+        with span("connect"):
+            conn = sqlite3.connect("users.db")
+        conn = traced_connection(conn)
         try:
             return func(conn, *args, **kwargs)
         finally:
             conn.close()
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, max_delay=30,
+                     retry_if=is_retryable, budget=retry_budget):
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             attempt = 0
             while attempt < retries:
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
                     attempt += 1
-                    print(f"[Retry {attempt}/{retries}] Error: {e}")
-                    if attempt >= retries:
+                    pause = should_retry(e, attempt, retries, delay,
+                                         max_delay, retry_if, budget)
+                    if pause is None:
                         raise
-                    time.sleep(delay)
+                    with span("retry_sleep", attempt=attempt):
+                        time.sleep(pause)
+                else:
+                    if budget is not None:
+                        budget.deposit()
+                    return result
         return wrapper
     return decorator
 
@@ -37,5 +112,6 @@ def fetch_users_with_retry(conn):
     return cursor.fetchall()
 
 # Example usage
-users = fetch_users_with_retry()
-print(users)
+if __name__ == "__main__":
+    users = fetch_users_with_retry()
+    print(users)
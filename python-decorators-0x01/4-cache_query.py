@@ -1,12 +1,16 @@
 import sqlite3
 import functools
 
+from tracing import span, traced_connection
+
 query_cache = {}
 
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
+        with span("connect"):
+            conn = sqlite3.connect("users.db")
+        conn = traced_connection(conn)
         try:
             return func(conn, *args, **kwargs)
         finally:
@@ -17,7 +21,9 @@ def cache_query(func):
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         query = kwargs.get("query") or (args[0] if args else None)
-        if query in query_cache:
+        with span("cache_lookup", query=query):
+            hit = query in query_cache
+        if hit:
             print("[CACHE] Returning cached result")
             return query_cache[query]
         result = func(conn, *args, **kwargs)
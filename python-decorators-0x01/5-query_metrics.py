@@ -0,0 +1,293 @@
+import re
+import time
+import sqlite3
+import functools
+import threading
+from collections import deque
+from datetime import datetime
+
+DB_PATH = "users.db"
+SLOW_QUERY_THRESHOLD_MS = 100
+
+_stats_lock = threading.Lock()
+_histograms = {}
+slow_query_log = deque(maxlen=100)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    # Same statement shape -> same histogram, whatever the literals were
+    query = _STRING.sub("?", query)
+    query = _NUMBER.sub("?", query)
+    query = _IN_LIST.sub("IN (?)", query)
+    return _SPACE.sub(" ", query).strip().rstrip(";")
+
+
+class LatencyHistogram:
+    # HDR-style log-linear buckets over microseconds: every power of two is
+    # split into SUB_BUCKETS linear steps, so any recorded value is reported
+    # within 1/SUB_BUCKETS (~6%) of its true value.
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _bucket(cls, value):
+        shift = max(value.bit_length() - cls.SUB_BUCKET_BITS - 1, 0)
+        return shift, value >> shift
+
+    def record(self, seconds):
+        value = max(int(seconds * 1_000_000), 0)
+        key = self._bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total_us += value
+        self.max_us = max(self.max_us, value)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for shift, top in sorted(self.buckets):
+            seen += self.buckets[(shift, top)]
+            if seen >= rank:
+                # Highest value that falls into this bucket, like HdrHistogram
+                return min(((top + 1) << shift) - 1, self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_us / self.count / 1000 if self.count else 0,
+            "p50_ms": self.percentile(50) / 1000,
+            "p95_ms": self.percentile(95) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "max_ms": self.max_us / 1000,
+        }
+
+
+def _explain(conn, query, params):
+    try:
+        return conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    except sqlite3.Error:
+        return None
+
+
+def record_query(query, params, elapsed, conn=None):
+    statement = normalize_query(query)
+    with _stats_lock:
+        histogram = _histograms.get(statement)
+        if histogram is None:
+            histogram = _histograms[statement] = LatencyHistogram()
+        histogram.record(elapsed)
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms < SLOW_QUERY_THRESHOLD_MS:
+        return
+    if conn is not None:
+        plan = _explain(conn, query, params)
+    else:
+        explain_conn = sqlite3.connect(DB_PATH)
+        try:
+            plan = _explain(explain_conn, query, params)
+        finally:
+            explain_conn.close()
+    slow_query_log.append({
+        "at": datetime.now(),
+        "statement": statement,
+        "query": query,
+        "elapsed_ms": elapsed_ms,
+        "plan": plan,
+    })
+    print(f"[SLOW QUERY {elapsed_ms:.1f}ms] {query}")
+
+
+class _TimedCursor:
+    # Time spent in execute() and the fetch*() calls that follow it is
+    # charged to the statement; the sample is recorded on the next execute
+    # or when the decorated call returns.
+    def __init__(self, cursor, conn):
+        self._cursor = cursor
+        self._conn = conn
+        self._pending = None
+
+    def _flush(self):
+        if self._pending is not None:
+            query, params, elapsed = self._pending
+            self._pending = None
+            record_query(query, params, elapsed, self._conn)
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                query, params, elapsed = self._pending
+                self._pending = (query, params,
+                                 elapsed + time.perf_counter() - start)
+
+    def execute(self, query, params=()):
+        self._flush()
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(query, params)
+        finally:
+            self._pending = (query, params, time.perf_counter() - start)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._flush()
+        # The first parameter set is enough to EXPLAIN a slow batch
+        seq_of_params = list(seq_of_params)
+        params = seq_of_params[0] if seq_of_params else ()
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(query, seq_of_params)
+        finally:
+            self._pending = (query, params, time.perf_counter() - start)
+        return self
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TimedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursors = []
+
+    def cursor(self):
+        cursor = _TimedCursor(self._conn.cursor(), self._conn)
+        self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, query, params=()):
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        return self.cursor().executemany(query, seq_of_params)
+
+    def flush(self):
+        for cursor in self._cursors:
+            cursor._flush()
+        self._cursors.clear()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def monitor_queries(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Functions that get a connection injected: time each statement
+        if args and isinstance(args[0], sqlite3.Connection):
+            conn = _TimedConnection(args[0])
+            try:
+                return func(conn, *args[1:], **kwargs)
+            finally:
+                conn.flush()
+        # Functions that take the SQL and open their own connection:
+        # time the whole call under that statement. Anything else (e.g.
+        # get_user(5)) is passed through untimed.
+        query = kwargs.get("query", args[0] if args else None)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if isinstance(query, str):
+                record_query(query, (), time.perf_counter() - start)
+    return wrapper
+
+
+def query_stats():
+    with _stats_lock:
+        return {stmt: h.summary() for stmt, h in _histograms.items()}
+
+
+def dump_query_stats():
+    stats = query_stats()
+    print(f"{'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statement")
+    for statement, s in sorted(stats.items(),
+                               key=lambda item: -item[1]["p99_ms"]):
+        print(f"{s['count']:>7} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} "
+              f"{s['p99_ms']:>9.3f}  {statement}")
+    return stats
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _histograms.clear()
+    slow_query_log.clear()
+
+
+def with_db_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+@monitor_queries
+def fetch_all_users(query):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(query)
+    results = cursor.fetchall()
+    conn.close()
+    return results
+
+
+@with_db_connection
+@monitor_queries
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+@with_db_connection
+@monitor_queries
+def fetch_users_with_retry(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+# Example usage
+if __name__ == "__main__":
+    SLOW_QUERY_THRESHOLD_MS = 5
+    for user_id in range(1, 201):
+        get_user_by_id(user_id=user_id)
+    for _ in range(20):
+        fetch_all_users(query="SELECT * FROM users")
+        fetch_users_with_retry()
+    dump_query_stats()
+    for entry in slow_query_log:
+        print(entry["elapsed_ms"], entry["statement"], entry["plan"])
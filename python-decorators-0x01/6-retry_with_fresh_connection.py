@@ -0,0 +1,84 @@
+import time
+import sqlite3
+import functools
+
+from db_pool import default_pool
+from tracing import span, traced_connection
+
+retry_module = __import__('3-retry_on_failure')
+is_retryable = retry_module.is_retryable
+should_retry = retry_module.should_retry
+retry_budget = retry_module.retry_budget
+
+# Errors that mean the connection itself is unusable: retrying on the same
+# handle can never work, but a freshly opened one usually does
+CONNECTION_ERROR_MESSAGES = (
+    "cannot operate on a closed database",
+    "disk i/o error",
+    "unable to open database file",
+    "database disk image is malformed",
+)
+
+
+def is_connection_error(error):
+    if not isinstance(error, sqlite3.Error):
+        return False
+    message = str(error).lower()
+    return any(text in message for text in CONNECTION_ERROR_MESSAGES)
+
+
+def is_worth_retrying(error):
+    # A broken connection is worth retrying too: the next attempt gets
+    # a fresh one
+    return is_connection_error(error) or is_retryable(error)
+
+
+def with_connection_retry(retries=3, delay=1, max_delay=30, pool=None,
+                          budget=retry_budget):
+    # Replaces @with_db_connection + @retry_on_failure: every attempt checks
+    # out its own connection, and a connection that failed at the connection
+    # level is discarded instead of going back to the pool.
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn_pool = pool or default_pool
+            attempt = 0
+            while True:
+                conn = conn_pool.get()
+                try:
+                    result = func(traced_connection(conn), *args, **kwargs)
+                except Exception as e:
+                    conn_pool.put(conn, discard=is_connection_error(e))
+                    attempt += 1
+                    pause = should_retry(e, attempt, retries, delay,
+                                         max_delay, is_worth_retrying, budget)
+                    if pause is None:
+                        raise
+                    with span("retry_sleep", attempt=attempt):
+                        time.sleep(pause)
+                except BaseException:
+                    # KeyboardInterrupt, SystemExit...: no retry, but the
+                    # connection and its pool slot still go back
+                    conn_pool.put(conn, discard=not conn_pool.is_healthy(conn))
+                    raise
+                else:
+                    conn_pool.put(conn)
+                    if budget is not None:
+                        budget.deposit()
+                    return result
+        return wrapper
+    return decorator
+
+
+@with_connection_retry(retries=3, delay=1)
+def fetch_users_with_retry(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+# Example usage
+if __name__ == "__main__":
+    users = fetch_users_with_retry()
+    print(users)
+    print(default_pool.stats)
@@ -0,0 +1,149 @@
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import functools
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "users.db"
+
+_local = threading.local()
+
+
+class WriteBatch:
+    def __init__(self, conn, flush_every=None):
+        self.conn = conn
+        self.flush_every = flush_every
+        self.savepoints = 0
+        self.pending = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.commits = 0
+
+    def commit(self):
+        self.conn.execute("COMMIT")
+        self.commits += 1
+        self.pending = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+
+
+def current_batch():
+    return getattr(_local, "batch", None)
+
+
+@contextmanager
+def batch_transaction(db_path=None, flush_every=None):
+    # Every @with_db_connection/@transactional call made inside this block
+    # shares one connection and one transaction, committed once at the end
+    # (or every `flush_every` successful calls).
+    batch = current_batch()
+    if batch is not None:
+        yield batch
+        return
+    conn = sqlite3.connect(db_path or DB_PATH, isolation_level=None)
+    batch = WriteBatch(conn, flush_every)
+    _local.batch = batch
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield batch
+        conn.execute("COMMIT")
+        batch.commits += 1
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        _local.batch = None
+        conn.close()
+
+
+def with_db_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        batch = current_batch()
+        if batch is not None:
+            return func(batch.conn, *args, **kwargs)
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+def transactional(func):
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        batch = current_batch()
+        if batch is None or batch.conn is not conn:
+            try:
+                result = func(conn, *args, **kwargs)
+                conn.commit()
+                return result
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+        # Inside a batch: a savepoint per call, so a failure only undoes
+        # this call's writes and the rest of the batch still commits
+        savepoint = f"call_{batch.savepoints}"
+        batch.savepoints += 1
+        conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            result = func(conn, *args, **kwargs)
+        except Exception:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            batch.failed += 1
+            raise
+        conn.execute(f"RELEASE {savepoint}")
+        batch.succeeded += 1
+        batch.pending += 1
+        if batch.flush_every and batch.pending >= batch.flush_every:
+            batch.commit()
+        return result
+    return wrapper
+
+@with_db_connection
+@transactional
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+def benchmark(updates=500):
+    # Runs against a copy so users.db keeps its data
+    global DB_PATH
+    source = DB_PATH
+    fd, DB_PATH = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    shutil.copyfile(source, DB_PATH)
+    try:
+        start = time.perf_counter()
+        for user_id in range(1, updates + 1):
+            update_user_email(user_id=user_id, new_email=f"a{user_id}@example.com")
+        per_call = updates / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with batch_transaction():
+            for user_id in range(1, updates + 1):
+                update_user_email(user_id=user_id, new_email=f"b{user_id}@example.com")
+        batched = updates / (time.perf_counter() - start)
+    finally:
+        os.remove(DB_PATH)
+        DB_PATH = source
+    print(f"per-call commits: {per_call:10.0f} updates/sec")
+    print(f"batched commits:  {batched:10.0f} updates/sec ({batched / per_call:.1f}x)")
+
+
+# Example usage
+if __name__ == "__main__":
+    with batch_transaction() as batch:
+        update_user_email(user_id=1, new_email="test@example.com")
+        try:
+            update_user_email(user_id=2, new_email=object())
+        except sqlite3.Error as e:
+            print(f"[BATCH] Call rolled back: {e}")
+    print(f"[BATCH] {batch.succeeded} ok, {batch.failed} failed, {batch.commits} commit(s)")
+    benchmark()
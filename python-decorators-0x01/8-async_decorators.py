@@ -0,0 +1,306 @@
+import asyncio
+import inspect
+import sqlite3
+import weakref
+import functools
+from datetime import datetime
+
+import aiosqlite
+
+retry_module = __import__('3-retry_on_failure')
+is_retryable = retry_module.is_retryable
+should_retry = retry_module.should_retry
+retry_budget = retry_module.retry_budget
+
+DB_PATH = "users.db"
+
+query_cache = {}
+_inflight = {}
+_LEADER_CANCELLED = object()
+
+
+class AsyncConnectionPool:
+    # aiosqlite runs each connection on its own non-daemon thread, so idle
+    # connections must be closed before the loop ends or the interpreter
+    # never exits.  The pool is therefore only used inside
+    # `async with AsyncConnectionPool():`, which makes it the running
+    # loop's pool and closes it on exit; outside that block the decorators
+    # open a connection per call.
+    def __init__(self, db_path=DB_PATH, max_size=5):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_size)
+        self._loop = None
+
+    async def __aenter__(self):
+        self._loop = asyncio.get_running_loop()
+        if self._loop in _pools:
+            raise RuntimeError("another AsyncConnectionPool is already active")
+        _pools[self._loop] = self
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        _pools.pop(self._loop, None)
+        await self.close()
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if await self.is_healthy(conn):
+                    return conn
+                await self._close(conn)
+            return await aiosqlite.connect(self.db_path)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn, discard=False):
+        try:
+            if discard:
+                await self._close(conn)
+                return
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.append(conn)
+        except (sqlite3.Error, ValueError):
+            await self._close(conn)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    async def is_healthy(conn):
+        try:
+            await conn.execute("SELECT 1")
+            return True
+        except (sqlite3.Error, ValueError):
+            return False
+
+    @staticmethod
+    async def _close(conn):
+        try:
+            await conn.close()
+        except (sqlite3.Error, ValueError):
+            pass
+
+    async def close(self):
+        while self._idle:
+            await self._close(self._idle.pop())
+
+
+# aiosqlite connections and asyncio primitives belong to one event loop,
+# so the active pool (if any) is looked up per running loop
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_async_pool():
+    return _pools.get(asyncio.get_running_loop())
+
+
+def log_queries(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            query = kwargs.get("query") or (args[0] if args else None)
+            if query:
+                print(f"[{datetime.now()}] Executing query: {query}")
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        query = kwargs.get("query") or (args[0] if args else None)
+        if query:
+            print(f"[{datetime.now()}] Executing query: {query}")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            pool = get_async_pool()
+            if pool is None:
+                async with aiosqlite.connect(DB_PATH) as conn:
+                    return await func(conn, *args, **kwargs)
+            conn = await pool.acquire()
+            try:
+                result = await func(conn, *args, **kwargs)
+            except BaseException:
+                # An application error leaves the connection usable; only
+                # drop it if it no longer answers
+                await pool.release(conn, discard=not await pool.is_healthy(conn))
+                raise
+            await pool.release(conn)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+def transactional(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            try:
+                result = await func(conn, *args, **kwargs)
+                await conn.commit()
+                return result
+            except BaseException:
+                await conn.rollback()
+                raise
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        try:
+            result = func(conn, *args, **kwargs)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            raise e
+    return wrapper
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30,
+                     retry_if=is_retryable, budget=retry_budget):
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return retry_module.retry_on_failure(
+                retries, delay, max_delay, retry_if, budget)(func)
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            attempt = 0
+            while attempt < retries:
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    attempt += 1
+                    pause = should_retry(
+                        e, attempt, retries, delay, max_delay, retry_if, budget)
+                    if pause is None:
+                        raise
+                    # Yields to the loop instead of blocking it
+                    await asyncio.sleep(pause)
+                else:
+                    if budget is not None:
+                        budget.deposit()
+                    return result
+        return async_wrapper
+    return decorator
+
+
+def cache_query(func):
+    if inspect.iscoroutinefunction(func):
+        # Stack it outside with_db_connection (see fetch_users_with_cache)
+        # so hits and waiting followers never hold a pool connection; the
+        # query is the `query` kwarg or the first string argument
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            query = kwargs.get("query") or next(
+                (arg for arg in args if isinstance(arg, str)), None)
+            while True:
+                if query in query_cache:
+                    print("[CACHE] Returning cached result")
+                    return query_cache[query]
+                # Single flight: concurrent misses for the same query wait
+                # on the first caller's result instead of all hitting the
+                # database
+                pending = _inflight.get(query)
+                if pending is None:
+                    break
+                print("[CACHE] Waiting for in-flight query")
+                result = await asyncio.shield(pending)
+                if result is not _LEADER_CANCELLED:
+                    return result
+                # The leader was cancelled: look again, maybe lead
+            pending = _inflight[query] = asyncio.get_running_loop().create_future()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                pending.set_result(_LEADER_CANCELLED)
+                raise
+            except Exception as e:
+                pending.set_exception(e)
+                pending.exception()
+                raise
+            else:
+                query_cache[query] = result
+                pending.set_result(result)
+                return result
+            finally:
+                _inflight.pop(query, None)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        query = kwargs.get("query") or (args[0] if args else None)
+        if query in query_cache:
+            print("[CACHE] Returning cached result")
+            return query_cache[query]
+        result = func(conn, *args, **kwargs)
+        query_cache[query] = result
+        return result
+    return wrapper
+
+
+@log_queries
+async def fetch_all_users(query):
+    async with aiosqlite.connect(DB_PATH) as db:
+        async with db.execute(query) as cursor:
+            return await cursor.fetchall()
+
+
+@with_db_connection
+async def get_user_by_id(conn, user_id):
+    async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+        return await cursor.fetchone()
+
+
+@with_db_connection
+@transactional
+async def update_user_email(conn, user_id, new_email):
+    await conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+@with_db_connection
+@retry_on_failure(retries=3, delay=1)
+async def fetch_users_with_retry(conn):
+    async with conn.execute("SELECT * FROM users") as cursor:
+        return await cursor.fetchall()
+
+
+@cache_query
+@with_db_connection
+async def fetch_users_with_cache(conn, query):
+    async with conn.execute(query) as cursor:
+        return await cursor.fetchall()
+
+
+# Example usage
+async def main():
+    print(await get_user_by_id(user_id=1))
+    async with AsyncConnectionPool(DB_PATH):
+        users = await asyncio.gather(*(get_user_by_id(user_id=i) for i in range(1, 21)))
+        print(users[0])
+        await update_user_email(user_id=1, new_email="test@example.com")
+        print(len(await fetch_users_with_retry()))
+        results = await asyncio.gather(
+            *(fetch_users_with_cache(query="SELECT * FROM users") for _ in range(10)))
+        print(len(results), "results,", len(query_cache), "cached query")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
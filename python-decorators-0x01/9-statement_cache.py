@@ -0,0 +1,163 @@
+import time
+import sqlite3
+import functools
+import threading
+from collections import OrderedDict
+
+from db_pool import ConnectionPool
+
+DB_PATH = "users.db"
+STATEMENT_CACHE_SIZE = 64
+
+
+class StatementCache:
+    # sqlite3 already keeps an LRU of prepared statements keyed by SQL text
+    # on every connection (`cached_statements`); it only pays off when the
+    # connection outlives one call.  This mirror uses the same key and
+    # capacity so we can see hits, misses and evictions per connection.
+    def __init__(self, capacity=STATEMENT_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, sql):
+        with self._lock:
+            if sql in self._entries:
+                self._entries.move_to_end(sql)
+                self.hits += 1
+                return True
+            self.misses += 1
+            if self.capacity <= 0:
+                return False
+            self._entries[sql] = True
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return False
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+class _CachedCursor:
+    def __init__(self, cursor, cache):
+        self._cursor = cursor
+        self._cache = cache
+
+    def execute(self, sql, params=()):
+        self._cache.lookup(sql)
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cache.lookup(sql)
+        self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class PreparedConnection:
+    def __init__(self, db_path=DB_PATH, capacity=STATEMENT_CACHE_SIZE):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False,
+                                     cached_statements=capacity)
+        self.statements = StatementCache(capacity)
+
+    def cursor(self):
+        return _CachedCursor(self._conn.cursor(), self.statements)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class StatementPool(ConnectionPool):
+    # Pings the raw connection, so the checkout health check doesn't show
+    # up as a statement cache hit on every call
+    @staticmethod
+    def is_healthy(conn):
+        return ConnectionPool.is_healthy(conn._conn)
+
+
+def create_statement_pool(db_path=DB_PATH, max_size=5,
+                          capacity=STATEMENT_CACHE_SIZE):
+    return StatementPool(db_path, max_size=max_size,
+                         connect=lambda: PreparedConnection(db_path, capacity))
+
+
+statement_pool = create_statement_pool()
+
+
+def with_prepared_connection(pool=None):
+    # Like @with_db_connection, but the connection (and the statements it
+    # has already prepared) comes from a pool and goes back after the call
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with (pool or statement_pool).connection() as conn:
+                return func(conn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def with_db_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+@with_prepared_connection()
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def _lookup(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def benchmark(calls=20000):
+    variants = [
+        ("new connection per call", with_db_connection(_lookup)),
+        ("pooled, no statement cache",
+         with_prepared_connection(create_statement_pool(capacity=0))(_lookup)),
+        ("pooled, statement cache",
+         with_prepared_connection(create_statement_pool())(_lookup)),
+    ]
+    for label, fetch in variants:
+        fetch(1)
+        start = time.perf_counter()
+        for i in range(calls):
+            fetch(i % 1000 + 1)
+        elapsed = time.perf_counter() - start
+        print(f"{label:28} {elapsed / calls * 1e6:8.2f} us/call")
+
+
+# Example usage
+if __name__ == "__main__":
+    for user_id in range(1, 101):
+        get_user_by_id(user_id=user_id)
+    with statement_pool.connection() as conn:
+        print(conn.statements.stats())
+    benchmark()
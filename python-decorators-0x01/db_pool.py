@@ -0,0 +1,103 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from tracing import span
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, db_path="users.db", max_size=5, timeout=5.0,
+                 connect=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._connect = connect or (
+            lambda: sqlite3.connect(db_path, check_same_thread=False))
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def get(self):
+        with span("connect", pooled=True):
+            return self._checkout()
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"no connection available after {self.timeout}s")
+        try:
+            # Hand out the most recently used idle connection that still
+            # answers; anything broken while idle is thrown away here.
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self.is_healthy(conn):
+                    self._count("reused")
+                    return conn
+                self._close(conn)
+            conn = self._connect()
+            self._count("created")
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, conn, discard=False):
+        try:
+            if discard:
+                self._close(conn)
+            else:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        except sqlite3.Error:
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    def _close(self, conn):
+        self._count("discarded")
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.get()
+        try:
+            yield conn
+        except BaseException:
+            self.put(conn, discard=not self.is_healthy(conn))
+            raise
+        else:
+            self.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+default_pool = ConnectionPool()
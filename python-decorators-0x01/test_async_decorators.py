@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Lifecycle tests for the async decorators' connection handling."""
+
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+decorators = __import__('8-async_decorators')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestAsyncConnectionLifecycle(unittest.TestCase):
+    """Decorated coroutines must not keep the interpreter alive."""
+
+    def setUp(self):
+        """Create a throwaway users.db and point the module at it."""
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                     "email TEXT UNIQUE)")
+        conn.executemany("INSERT INTO users (name, email) VALUES (?, ?)",
+                         [("alice", "a@x.io"), ("bob", "b@x.io")])
+        conn.commit()
+        conn.close()
+        self.addCleanup(os.remove, self.db_path)
+        original = decorators.DB_PATH
+        decorators.DB_PATH = self.db_path
+        self.addCleanup(setattr, decorators, "DB_PATH", original)
+
+    def test_bare_asyncio_run_exits(self):
+        """asyncio.run of a decorated coroutine returns and the process ends."""
+        script = (
+            "import asyncio\n"
+            "m = __import__('8-async_decorators')\n"
+            "m.DB_PATH = {!r}\n"
+            "print(asyncio.run(m.get_user_by_id(user_id=1)))\n"
+        ).format(self.db_path)
+        done = subprocess.run([sys.executable, "-c", script], cwd=HERE,
+                              capture_output=True, text=True, timeout=30)
+        self.assertEqual(done.returncode, 0, done.stderr)
+        self.assertIn("alice", done.stdout)
+
+    def test_application_error_keeps_pooled_connection(self):
+        """An IntegrityError does not throw the pooled connection away."""
+        seen = []
+
+        @decorators.with_db_connection
+        async def insert_duplicate(conn):
+            seen.append(conn)
+            await conn.execute("INSERT INTO users (email) VALUES ('a@x.io')")
+
+        async def run():
+            async with decorators.AsyncConnectionPool(self.db_path) as pool:
+                for _ in range(2):
+                    with self.assertRaises(sqlite3.IntegrityError):
+                        await insert_duplicate()
+                self.assertIs(decorators.get_async_pool(), pool)
+            self.assertIsNone(decorators.get_async_pool())
+
+        asyncio.run(run())
+        self.assertIs(seen[0], seen[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
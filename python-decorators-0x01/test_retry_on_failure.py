@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for retry_on_failure: error classification, retries and budget."""
+
+import sqlite3
+import unittest
+
+from unittest.mock import patch
+
+retry_module = __import__('3-retry_on_failure')
+retry_on_failure = retry_module.retry_on_failure
+RetryBudget = retry_module.RetryBudget
+should_retry = retry_module.should_retry
+
+
+class TestRetryOnFailure(unittest.TestCase):
+    """Only transient errors are retried, within the retry budget."""
+
+    def setUp(self):
+        """Skip the backoff sleeps."""
+        sleep_patcher = patch.object(retry_module.time, "sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_locked_error_is_retried(self):
+        """A locked database is retried until the call succeeds."""
+        calls = []
+
+        @retry_on_failure(retries=3, delay=1, budget=None)
+        def fetch():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return "rows"
+
+        self.assertEqual(fetch(), "rows")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_syntax_error_is_raised_once(self):
+        """A syntax error is raised at once, without a retry message."""
+        calls = []
+
+        @retry_on_failure(retries=3, delay=1, budget=None)
+        def fetch():
+            calls.append(1)
+            raise sqlite3.OperationalError('near "SELEC": syntax error')
+
+        with patch("builtins.print") as mock_print:
+            with self.assertRaises(sqlite3.OperationalError):
+                fetch()
+        self.assertEqual(len(calls), 1)
+        self.sleep.assert_not_called()
+        mock_print.assert_not_called()
+
+    def test_exhausted_budget_fails_fast(self):
+        """With no retry tokens left, a retryable error is not retried."""
+        budget = RetryBudget(ratio=0.2, max_tokens=1)
+        calls = []
+
+        @retry_on_failure(retries=5, delay=1, budget=budget)
+        def fetch():
+            calls.append(1)
+            raise sqlite3.OperationalError("database is locked")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            fetch()
+        # One retry spends the only token, the next failure gives up
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.sleep.call_count, 1)
+        self.assertLess(budget.tokens, 1)
+
+    def test_success_refills_budget(self):
+        """Successful calls earn back retry tokens."""
+        budget = RetryBudget(ratio=0.5, max_tokens=2)
+        budget.tokens = 0
+
+        @retry_on_failure(retries=3, delay=1, budget=budget)
+        def fetch():
+            return "rows"
+
+        fetch()
+        fetch()
+        self.assertEqual(budget.tokens, 1)
+
+
+    def test_should_retry_decision(self):
+        """should_retry returns a backoff within bounds, or None."""
+        locked = sqlite3.OperationalError("database is locked")
+        missing = sqlite3.OperationalError("no such table: users")
+        with patch("builtins.print"):
+            pause = should_retry(locked, 2, 3, delay=1, budget=None)
+            self.assertIsNotNone(pause)
+            self.assertLessEqual(pause, 2)
+            self.assertIsNone(should_retry(locked, 3, 3, budget=None))
+            self.assertIsNone(should_retry(missing, 1, 3, budget=None))
+
+
+if __name__ == '__main__':
+    unittest.main()
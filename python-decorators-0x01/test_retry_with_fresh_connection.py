@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Fault-injection tests for with_connection_retry."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from db_pool import ConnectionPool
+from unittest.mock import patch
+
+retry_module = __import__('6-retry_with_fresh_connection')
+with_connection_retry = retry_module.with_connection_retry
+
+
+class TestWithConnectionRetry(unittest.TestCase):
+    """Each attempt must run on a fresh or validated connection."""
+
+    def setUp(self):
+        """Create a throwaway users.db and a pool over it."""
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO users (name) VALUES (?)",
+                         [("alice",), ("bob",)])
+        conn.commit()
+        conn.close()
+        self.pool = ConnectionPool(self.db_path, max_size=2)
+        sleep_patcher = patch.object(retry_module.time, "sleep")
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def tearDown(self):
+        """Close pooled connections and remove the database file."""
+        self.pool.close()
+        os.remove(self.db_path)
+
+    def test_recovers_from_connection_closed_mid_call(self):
+        """A connection that dies mid-call is replaced on the next attempt."""
+        seen = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def fetch_users(conn):
+            seen.append(conn)
+            if len(seen) == 1:
+                conn.close()
+            return conn.execute("SELECT name FROM users").fetchall()
+
+        self.assertEqual(fetch_users(), [("alice",), ("bob",)])
+        self.assertEqual(len(seen), 2)
+        self.assertIsNot(seen[0], seen[1])
+        self.assertEqual(self.pool.stats["discarded"], 1)
+
+    def test_recovers_from_disk_io_error(self):
+        """An injected disk I/O error discards the connection and retries."""
+        seen = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def fetch_users(conn):
+            seen.append(conn)
+            if len(seen) == 1:
+                raise sqlite3.OperationalError("disk I/O error")
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()
+
+        self.assertEqual(fetch_users(), (2,))
+        self.assertIsNot(seen[0], seen[1])
+        self.assertEqual(self.pool.stats["created"], 2)
+
+    def test_locked_error_reuses_healthy_connection(self):
+        """A lock error is retried but the healthy connection is kept."""
+        seen = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def fetch_users(conn):
+            seen.append(conn)
+            if len(seen) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()
+
+        self.assertEqual(fetch_users(), (2,))
+        self.assertIs(seen[0], seen[1])
+        self.assertEqual(self.pool.stats["discarded"], 0)
+
+    def test_broken_idle_connection_is_not_handed_out(self):
+        """Checkout validates idle connections and drops broken ones."""
+        conn = self.pool.get()
+        self.pool.put(conn)
+        conn.close()
+        fresh = self.pool.get()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(fresh.execute("SELECT 1").fetchone(), (1,))
+        self.pool.put(fresh)
+
+    def test_non_retryable_error_is_raised_at_once(self):
+        """Errors that cannot succeed on retry are not retried."""
+        calls = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def fetch_missing(conn):
+            calls.append(conn)
+            return conn.execute("SELECT * FROM missing").fetchall()
+
+        with self.assertRaises(sqlite3.OperationalError):
+            fetch_missing()
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_retries(self):
+        """A connection that keeps failing exhausts the retries."""
+        calls = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def always_broken(conn):
+            calls.append(conn)
+            raise sqlite3.OperationalError("disk I/O error")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            always_broken()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.pool.stats["discarded"], 3)
+
+    def test_base_exception_returns_connection(self):
+        """KeyboardInterrupt is not retried and does not leak a slot."""
+        calls = []
+
+        @with_connection_retry(retries=3, delay=0, pool=self.pool,
+                               budget=None)
+        def interrupted(conn):
+            calls.append(conn)
+            raise KeyboardInterrupt
+
+        for _ in range(self.pool.max_size + 1):
+            with self.assertRaises(KeyboardInterrupt):
+                interrupted()
+        self.assertEqual(len(calls), self.pool.max_size + 1)
+        conn = self.pool.get()
+        self.pool.put(conn)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Opt-in instrumentation shared by the decorators.  Every layer wraps its
+# work in span("connect" | "cache_lookup" | "execute" | "commit" |
+# "rollback" | "retry_sleep") and, once a tracer is installed, the tracer
+# is called as tracer(name, seconds, attrs) when the span ends.  With no
+# tracer, span() hands back one shared no-op context manager.
+
+_tracer = None
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+def set_tracer(tracer):
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "parent")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.start
+        _local.stack.pop()
+        tracer = _tracer
+        if tracer is not None:
+            attrs = dict(self.attrs, parent=self.parent)
+            if exc_type is not None:
+                attrs["error"] = exc_type.__name__
+            tracer(self.name, elapsed, attrs)
+
+
+def span(name, **attrs):
+    if _tracer is None:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+class _TracedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        with span("execute", query=sql):
+            self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        with span("execute", query=sql, many=True):
+            self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TracedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _TracedCursor(self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def traced_connection(conn):
+    # Only pay for the proxy while a tracer is installed
+    if _tracer is None:
+        return conn
+    return _TracedConnection(conn)
+
+
+@contextmanager
+def collect_spans():
+    spans = []
+    previous = set_tracer(
+        lambda name, seconds, attrs: spans.append((name, seconds, attrs)))
+    try:
+        yield spans
+    finally:
+        set_tracer(previous)
+
+
+# Example usage
+if __name__ == "__main__":
+    import timeit
+    import tracing  # the instance the decorators import, not __main__
+
+    retry_module = __import__('3-retry_on_failure')
+    with tracing.collect_spans() as spans:
+        retry_module.fetch_users_with_retry()
+    for name, seconds, attrs in spans:
+        print(f"{name:12} {seconds * 1e6:9.1f}us  parent={attrs['parent']}")
+
+    def empty_span():
+        with span("execute"):
+            pass
+    calls = 1_000_000
+    per_call = timeit.timeit(empty_span, number=calls) / calls
+    print(f"disabled span overhead: {per_call * 1e9:.0f}ns")